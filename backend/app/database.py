@@ -1,14 +1,28 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+# db_pool_size + db_max_overflow is the connection budget of one process.
+# Requests go through the async engine; the sync engine only serves the
+# model watcher, the event buffer and bulk scoring (one connection each,
+# two while scoring), so it gets a small fixed share and the async pool
+# the rest.
+SYNC_POOL = {'pool_size': settings.db_sync_pool_size, 'max_overflow': settings.db_sync_max_overflow}
+ASYNC_POOL = {
+    'pool_size': max(settings.db_pool_size - settings.db_sync_pool_size, 1),
+    'max_overflow': max(settings.db_max_overflow - settings.db_sync_max_overflow, 0),
+}
+
                         
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    **SYNC_POOL
 )
 
                         
@@ -18,6 +32,34 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def async_database_url() -> str:
+    """
+    asyncpg URL for ``database_url`` unless ``async_database_url`` is set.
+    ``prepared_statement_cache_size`` sizes SQLAlchemy's per-connection
+    cache of asyncpg prepared statements.
+    """
+    url = make_url(settings.async_database_url or settings.database_url)
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.update_query_dict(
+        {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+    ).render_as_string(hide_password=False)
+
+
+# Set db_statement_cache_size=0 when connecting through pgbouncer in
+# transaction pooling mode.
+async_engine = create_async_engine(
+    async_database_url(),
+    pool_pre_ping=True,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    connect_args={"statement_cache_size": settings.db_statement_cache_size},
+    **ASYNC_POOL
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
 def get_db():
 \
 \
@@ -27,3 +69,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def ensure_events_partitions(months_ahead: int):
+    """
+    Create the monthly events partitions from this month through
+    ``months_ahead`` months ahead, so new events stay out of events_default.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            text("SELECT create_events_partitions(NOW()::date, (NOW() + make_interval(months => :months))::date)"),
+            {"months": months_ahead}
+        )
+
+
+async def get_async_db():
+    """
+    Async session for endpoints that await their queries instead of holding
+    a threadpool worker for the round trip.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,446 @@
+import fcntl
+import io
+import itertools
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import psycopg2
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.database import engine as db_engine
+from app.ml.cache import get_prediction_cache
+from app.schemas import EventCreate
+
+logger = logging.getLogger(__name__)
+
+EVENT_BATCH = TypeAdapter(List[EventCreate])
+
+# One row per accepted request: the batch stays a JSON array until
+# Postgres expands it, so Python never encodes events one by one.
+STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS event_batch_staging (
+    received_at TIMESTAMP,
+    event_count INTEGER,
+    batch JSONB
+) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGING_SQL = "COPY event_batch_staging FROM STDIN"
+
+# Events for unknown users are left out by the join rather than failing the
+# whole flush on the foreign key; last_active moves once per user.
+INSERT_EVENTS_SQL = """
+WITH inserted AS (
+    INSERT INTO events (user_id, event_type, event_data, session_duration, timestamp)
+    SELECT e.user_id, e.event_type, e.event_data, e.session_duration, s.received_at
+    FROM event_batch_staging s
+    CROSS JOIN LATERAL jsonb_to_recordset(s.batch)
+        AS e(user_id INTEGER, event_type VARCHAR(100), event_data JSONB, session_duration FLOAT)
+    JOIN users u ON u.user_id = e.user_id
+    RETURNING user_id, timestamp
+), touched AS (
+    UPDATE users AS u
+    SET last_active = GREATEST(u.last_active, i.last_active)
+    FROM (
+        SELECT user_id, MAX(timestamp) AS last_active
+        FROM inserted
+        GROUP BY user_id
+    ) i
+    WHERE u.user_id = i.user_id
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted
+"""
+
+# Events the insert left out, regrouped into one COPY line per staged batch.
+UNKNOWN_USER_EVENTS_SQL = """
+SELECT s.received_at, COUNT(*), jsonb_agg(e.event ORDER BY e.n)::text
+FROM event_batch_staging s
+CROSS JOIN LATERAL jsonb_array_elements(s.batch) WITH ORDINALITY AS e(event, n)
+WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.user_id = (e.event->>'user_id')::integer)
+GROUP BY s.ctid, s.received_at
+"""
+
+WAL_SUFFIX = ".wal"
+WAL_LOCK_FILE = "lock"
+# COPY lines the database refused on their own, or with events for unknown
+# users; kept for inspection and manual replay rather than retried forever.
+DEAD_LETTER_FILE = "dead-letter.copy"
+
+# Errors a batch's data can cause; other errors (connection, server) are
+# retried with the whole batch.
+BATCH_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+
+class BufferFull(Exception):
+    pass
+
+
+def _lock_wal_dir(wal_dir: Path):
+    """Non-blocking exclusive flock on ``wal_dir``; the lock file, or None if another process holds it."""
+    wal_dir.mkdir(parents=True, exist_ok=True)
+    lock_file = open(wal_dir / WAL_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.stem.split("-")[1])
+
+
+def _event_count(line: str) -> int:
+    return int(line.split("\t", 2)[1])
+
+
+def _copy_line(received_at: datetime, count: int, batch_json: str) -> str:
+    batch_json = batch_json.replace("\\", "\\\\")
+    return f"{received_at.isoformat()}\t{count}\t{batch_json}\n"
+
+
+def encode_batch(events: List[EventCreate], received_at: datetime) -> str:
+    """One COPY text line for ``event_batch_staging``; the WAL holds the same line."""
+    return _copy_line(received_at, len(events), EVENT_BATCH.dump_json(events).decode())
+
+
+class EventBuffer:
+    """Write-behind event buffer: batches are fsynced to a per-process WAL, then COPYed to Postgres."""
+
+    def __init__(self, wal_dir: str, max_events: int = 500_000, flush_events: int = 20_000,
+                 flush_interval: float = 0.2, put_timeout: float = 1.0, fsync: bool = True):
+        self.base_dir = Path(wal_dir)
+        self.wal_dir: Optional[Path] = None
+        self._lock_file = None
+        self.max_events = max_events
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.fsync = fsync
+
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._pending_events = 0
+        self._pending_users: Set[int] = set()
+        self._inflight_events = 0
+        self._sealed_segments: List[Path] = []
+        self._segment = None
+        self._segment_path: Optional[Path] = None
+        self._next_segment = 0
+
+        self._conn = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.accepted = 0
+        self.written = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.dead_lettered = 0
+        self.last_flush_seconds = 0.0
+
+    def _open_segment(self):
+        self._segment_path = self.wal_dir / f"events-{self._next_segment:012d}{WAL_SUFFIX}"
+        self._next_segment += 1
+        self._segment = open(self._segment_path, "a", encoding="utf-8")
+
+    def _seal_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._sealed_segments.append(self._segment_path)
+            self._segment, self._segment_path = None, None
+
+    def _claim_wal_dir(self):
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        for n in itertools.count():
+            wal_dir = self.base_dir / f"worker-{n}"
+            lock_file = _lock_wal_dir(wal_dir)
+            if lock_file is not None:
+                self.wal_dir, self._lock_file = wal_dir, lock_file
+                return
+
+    def _release_wal_dir(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _adopt_orphaned_segments(self):
+        """Move segments from WAL directories no running process holds into this one."""
+        own = sorted(self.wal_dir.glob(f"*{WAL_SUFFIX}"))
+        next_segment = _segment_number(own[-1]) + 1 if own else 0
+
+        def adopt(segments: List[Path]):
+            nonlocal next_segment
+            for path in segments:
+                try:
+                    path.rename(self.wal_dir / f"events-{next_segment:012d}{WAL_SUFFIX}")
+                except FileNotFoundError:
+                    continue  # taken over by another process starting up
+                next_segment += 1
+
+        adopt(sorted(self.base_dir.glob(f"*{WAL_SUFFIX}")))
+        for wal_dir in sorted(self.base_dir.glob("worker-*")):
+            if wal_dir == self.wal_dir:
+                continue
+            lock_file = _lock_wal_dir(wal_dir)
+            if lock_file is None:
+                continue
+            try:
+                segments = sorted(wal_dir.glob(f"*{WAL_SUFFIX}"))
+                if segments:
+                    logger.info(f"Taking over {len(segments)} WAL segments from {wal_dir}")
+                adopt(segments)
+            finally:
+                lock_file.close()
+
+    def _load_wal(self):
+        """Claim a WAL directory and queue its unflushed segments, dropping a torn final line."""
+        self._claim_wal_dir()
+        self._adopt_orphaned_segments()
+        segments = sorted(self.wal_dir.glob(f"*{WAL_SUFFIX}"))
+        for path in segments:
+            data = path.read_text(encoding="utf-8")
+            data = data[:data.rfind("\n") + 1]
+            if data:
+                self._pending.append(data)
+                self._pending_events += sum(_event_count(line) for line in data.splitlines())
+            self._sealed_segments.append(path)
+        if segments:
+            self._next_segment = _segment_number(segments[-1]) + 1
+            logger.info(f"Replaying {self._pending_events} buffered events from {len(segments)} WAL segments "
+                        f"in {self.wal_dir}")
+
+    def append(self, events: List[EventCreate], received_at: Optional[datetime] = None) -> int:
+        """
+        Durably buffer ``events``; returns the number accepted. Blocking.
+        """
+        if self.wal_dir is None:
+            raise RuntimeError("Event buffer is not started")
+        count = len(events)
+        if count > self.max_events:
+            raise ValueError(f"Batch of {count} events exceeds the buffer capacity of {self.max_events}")
+        if not count:
+            return 0
+        data = encode_batch(events, received_at or datetime.now())
+        users = {event.user_id for event in events}
+
+        with self._cond:
+            has_room = self._cond.wait_for(
+                lambda: self._pending_events + self._inflight_events + count <= self.max_events,
+                timeout=self.put_timeout
+            )
+            if not has_room:
+                raise BufferFull(f"Event buffer full ({self.max_events} events)")
+
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(data)
+            self._segment.flush()
+            if self.fsync:
+                os.fsync(self._segment.fileno())
+
+            self._pending.append(data)
+            self._pending_events += count
+            self._pending_users.update(users)
+            self.accepted += count
+            if self._pending_events >= self.flush_events:
+                self._cond.notify_all()
+        return count
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = db_engine.raw_connection()
+        return self._conn
+
+    def _discard_connection(self, broken: bool = True):
+        if self._conn is not None:
+            try:
+                self._conn.invalidate() if broken else self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _write(self, data: str, count: int) -> Tuple[int, List[str]]:
+        """
+        Returns (events inserted, COPY lines of the events left out).
+        """
+        conn = self._connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(STAGING_SQL)
+            cursor.copy_expert(COPY_STAGING_SQL, io.BytesIO(data.encode("utf-8")))
+            cursor.execute(INSERT_EVENTS_SQL)
+            inserted = cursor.fetchone()[0]
+            left_out = []
+            if inserted < count:
+                cursor.execute(UNKNOWN_USER_EVENTS_SQL)
+                left_out = [_copy_line(*row) for row in cursor.fetchall()]
+            conn.commit()
+            return inserted, left_out
+        finally:
+            cursor.close()
+
+    def _dead_letter(self, lines: List[str], reason: str):
+        logger.error(f"{sum(_event_count(line) for line in lines)} events moved to {DEAD_LETTER_FILE}: {reason}")
+        with open(self.wal_dir / DEAD_LETTER_FILE, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_separately(self, chunks: List[str]) -> Tuple[int, List[str], int, List[str]]:
+        """Write batches one transaction each; returns (inserted, left out, dead-lettered, unwritten)."""
+        lines = [line for chunk in chunks for line in chunk.splitlines(keepends=True)]
+        inserted = dead = 0
+        left_out = []
+        for i, line in enumerate(lines):
+            try:
+                line_inserted, line_left_out = self._write(line, _event_count(line))
+                inserted += line_inserted
+                left_out += line_left_out
+            except BATCH_ERRORS as e:
+                self._connection().rollback()
+                self._dead_letter([line], f"refused by the database: {str(e).strip()}")
+                dead += _event_count(line)
+            except Exception as e:
+                logger.error(f"Event flush failed: {e}")
+                self._discard_connection()
+                return inserted, left_out, dead, lines[i:]
+        return inserted, left_out, dead, []
+
+    def flush(self) -> int:
+        """Write everything buffered; returns events written. Refused batches are dead-lettered."""
+        with self._cond:
+            if not self._pending:
+                return 0
+            chunks, count, users = self._pending, self._pending_events, self._pending_users
+            self._pending, self._pending_events, self._pending_users = [], 0, set()
+            self._inflight_events += count
+            self._seal_segment()
+            segments, self._sealed_segments = self._sealed_segments, []
+
+        start = time.perf_counter()
+        dead, left_out, unwritten = 0, [], []
+        try:
+            inserted, left_out = self._write("".join(chunks), count)
+        except BATCH_ERRORS as e:
+            logger.warning(f"Event flush of {count} events refused ({str(e).strip()}), writing batches separately")
+            self._connection().rollback()
+            inserted, left_out, dead, unwritten = self._write_separately(chunks)
+        except Exception as e:
+            logger.error(f"Event flush of {count} events failed: {e}")
+            self._discard_connection()
+            inserted, unwritten = 0, chunks
+        if left_out:
+            self._dead_letter(left_out, "unknown user_id")
+
+        # Segments stay until every line in them is written or dead-lettered;
+        # a crash before then replays lines already written (at-least-once).
+        unwritten_count = sum(_event_count(line) for chunk in unwritten for line in chunk.splitlines())
+        if not unwritten:
+            for path in segments:
+                path.unlink(missing_ok=True)
+        with self._cond:
+            self._inflight_events -= count
+            self.written += inserted
+            self.rejected += sum(_event_count(line) for line in left_out)
+            self.dead_lettered += dead
+            if unwritten:
+                self._pending = unwritten + self._pending
+                self._pending_events += unwritten_count
+                self._pending_users |= users
+                self._sealed_segments = segments + self._sealed_segments
+                self.flush_errors += 1
+            else:
+                self.flushes += 1
+                self.last_flush_seconds = time.perf_counter() - start
+            self._cond.notify_all()
+
+        # Cached predictions for these users were scored on stale features.
+        if inserted:
+            cache = get_prediction_cache()
+            for user_id in users:
+                cache.invalidate_user(user_id)
+        return inserted
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or self._pending_events >= self.flush_events,
+                    timeout=self.flush_interval
+                )
+                stopping = self._stopping
+            errors = self.flush_errors
+            self.flush()
+            if stopping:
+                return
+            if self.flush_errors > errors:
+                # Back off instead of spinning against a database that is down.
+                time.sleep(self.flush_interval)
+
+    def start(self):
+        if self._thread is None:
+            self._load_wal()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="event-buffer-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Flush and stop the flusher; anything unwritten stays in the WAL."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        with self._cond:
+            self._seal_segment()
+            # Reloaded from the WAL, possibly another directory, on the next start.
+            self._pending, self._pending_events, self._pending_users = [], 0, set()
+            self._sealed_segments, self._next_segment = [], 0
+        self._discard_connection(broken=False)
+        self._release_wal_dir()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "pending_events": self._pending_events,
+                "inflight_events": self._inflight_events,
+                "capacity": self.max_events,
+                "accepted": self.accepted,
+                "written": self.written,
+                "rejected": self.rejected,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "dead_lettered": self.dead_lettered,
+                "last_flush_seconds": self.last_flush_seconds,
+                "wal_dir": str(self.wal_dir) if self.wal_dir else None,
+                "wal_segments": len(self._sealed_segments) + (self._segment is not None),
+            }
+
+
+_event_buffer: Optional[EventBuffer] = None
+
+
+def get_event_buffer() -> EventBuffer:
+    global _event_buffer
+    if _event_buffer is None:
+        _event_buffer = EventBuffer(
+            settings.event_wal_dir,
+            max_events=settings.event_buffer_max_events,
+            flush_events=settings.event_buffer_flush_events,
+            flush_interval=settings.event_buffer_flush_interval_ms / 1000,
+            put_timeout=settings.event_buffer_put_timeout_seconds,
+            fsync=settings.event_wal_fsync
+        )
+    return _event_buffer
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
 
                    
@@ -25,6 +27,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
                 
@@ -50,6 +53,7 @@ def root():
 def health_check():
                                
     from app.ml.inference import get_ml_engine
+    from app.ml.watcher import get_model_watcher
     
     try:
         ml_engine = get_ml_engine()
@@ -61,24 +65,62 @@ def health_check():
     return {
         "status": "healthy",
         "model_version": model_version,
+        "pending_model_version": get_model_watcher().pending_version,
         "environment": settings.environment
     }
 
 
+PARTITION_CHECK_INTERVAL_SECONDS = 86_400
+_partition_task = None
+
+
+async def maintain_events_partitions():
+    from app.database import ensure_events_partitions
+    while True:
+        try:
+            await run_in_threadpool(ensure_events_partitions, settings.events_partition_months_ahead)
+        except Exception as e:
+            logger.error(f"Creating upcoming events partitions failed: {e}")
+        await asyncio.sleep(PARTITION_CHECK_INTERVAL_SECONDS)
+
+
 @app.on_event("startup")
 async def startup_event():
                                          
     logger.info("Starting ML Analytics Platform...")
+    from app.ml.watcher import get_model_watcher
+    
     try:
-        from app.ml.inference import get_ml_engine
+        from app.ml.inference import configure_compilation_cache, get_ml_engine
+        configure_compilation_cache(settings.jax_compilation_cache_dir)
+        watcher = get_model_watcher()
+        await run_in_threadpool(watcher.check)
         ml_engine = get_ml_engine()
-        logger.info(f"ML engine initialized with model version: {ml_engine.current_version}")
+        logger.info(f"ML engine initialized with model version: {ml_engine.current_version} "
+                    f"(compiled {len(ml_engine.compile_times)} batch sizes in "
+                    f"{sum(ml_engine.compile_times.values()):.2f}s)")
     except Exception as e:
         logger.warning(f"ML engine initialization failed: {e}")
         logger.warning("API will start but predictions may not be available")
+    
+    get_model_watcher().start()
+
+    global _partition_task
+    _partition_task = asyncio.get_running_loop().create_task(maintain_events_partitions())
+    
+    from app.event_buffer import get_event_buffer
+    await run_in_threadpool(get_event_buffer().start)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
                              
     logger.info("Shutting down ML Analytics Platform...")
+    from app.database import async_engine
+    from app.event_buffer import get_event_buffer
+    from app.ml.watcher import get_model_watcher
+    await get_model_watcher().stop()
+    if _partition_task is not None:
+        _partition_task.cancel()
+    await run_in_threadpool(get_event_buffer().stop)
+    await async_engine.dispose()
@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+from app.config import settings
+
+# The model artifact format and the feature store are implemented once, in
+# ml_pipeline, and imported from there.
+ML_PIPELINE_PATH = settings.ml_pipeline_path or str(Path(__file__).resolve().parents[3] / 'ml_pipeline')
+if ML_PIPELINE_PATH not in sys.path:
+    sys.path.append(ML_PIPELINE_PATH)
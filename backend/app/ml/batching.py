@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.ml.features import FEATURE_COLUMNS
+from app.ml.inference import MLEngine, get_ml_engine
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests into one forward pass of up to max_batch_size rows or max_wait_ms."""
+
+    def __init__(
+        self,
+        engine_getter: Callable[[], MLEngine] = get_ml_engine,
+        max_batch_size: int = 512,
+        max_wait_ms: float = 2.0
+    ):
+        self.engine_getter = engine_getter
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self.stats: Dict[str, int] = {'requests': 0, 'rows': 0, 'batches': 0}
+
+    async def predict(self, features) -> Tuple[np.ndarray, str]:
+        """Churn probabilities for a feature vector or matrix, and the version of the model that produced them."""
+        rows = np.asarray(features, dtype=np.float32).reshape(-1, len(FEATURE_COLUMNS))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.append((rows, future))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        if not pending:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: List[Tuple[np.ndarray, asyncio.Future]]):
+        batch = np.concatenate([rows for rows, _ in pending])
+        loop = asyncio.get_running_loop()
+        try:
+            engine = self.engine_getter()
+            probabilities = await loop.run_in_executor(self._executor, engine.predict_proba, batch)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} rows: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats['requests'] += len(pending)
+        self.stats['rows'] += len(batch)
+        self.stats['batches'] += 1
+
+        offset = 0
+        for rows, future in pending:
+            if not future.done():
+                future.set_result((probabilities[offset:offset + len(rows)], engine.current_version))
+            offset += len(rows)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_batcher: Optional[MicroBatcher] = None
+
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(
+            max_batch_size=settings.inference_max_batch_size,
+            max_wait_ms=settings.inference_max_wait_ms
+        )
+    return _batcher
@@ -0,0 +1,173 @@
+import csv
+import io
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.database import engine as db_engine
+from app.ml.features import FEATURE_COLUMNS
+from app.ml.inference import MLEngine, get_ml_engine
+from data.feature_store import FeatureStore
+
+logger = logging.getLogger(__name__)
+
+COPY_PREDICTIONS_SQL = (
+    "COPY predictions (user_id, model_version, prediction_type, predicted_value, confidence, created_at) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+USER_COLUMNS = ['user_id', 'created_at', 'last_active', 'subscription_tier', 'churned']
+USERS_SQL = f"SELECT {', '.join(USER_COLUMNS)} FROM users ORDER BY user_id"
+
+
+class ScoringJob:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "pending"
+        self.model_version: Optional[str] = None
+        self.total_users = 0
+        self.scored_users = 0
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        elapsed = None
+        if self.started_at:
+            elapsed = ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "model_version": self.model_version,
+            "total_users": self.total_users,
+            "scored_users": self.scored_users,
+            "progress": self.scored_users / self.total_users if self.total_users else 0.0,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": elapsed,
+            "error": self.error,
+        }
+
+
+def _predictions_csv(user_ids: np.ndarray, probabilities: np.ndarray, model_version: str, created_at: str) -> io.StringIO:
+    confidence = np.maximum(probabilities, 1.0 - probabilities)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(zip(
+        user_ids.tolist(),
+        repeat(model_version),
+        repeat("churn"),
+        (f"{p:.6f}" for p in probabilities.tolist()),
+        (f"{c:.6f}" for c in confidence.tolist()),
+        repeat(created_at),
+    ))
+    buffer.seek(0)
+    return buffer
+
+
+def _user_chunks(conn, chunk_size: int) -> Iterator[pd.DataFrame]:
+    with conn.cursor(name='bulk_scoring_users') as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(USERS_SQL)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=USER_COLUMNS)
+
+
+def score_all_users(job: ScoringJob, ml_engine: MLEngine, chunk_size: int):
+    """Refresh the feature store, then build, score and COPY users one committed chunk at a time."""
+    reference_time = datetime.now(timezone.utc).replace(tzinfo=None)
+    created_at = reference_time.isoformat(sep=' ')
+    job.model_version = ml_engine.current_version
+
+    store = FeatureStore(settings.feature_store_path)
+    store.refresh(settings.database_url)
+
+    read_conn = db_engine.raw_connection()
+    write_conn = db_engine.raw_connection()
+    try:
+        with read_conn.cursor() as cursor:
+            # One snapshot for the count and the user stream.
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cursor.execute("SELECT COUNT(*) FROM users")
+            job.total_users = cursor.fetchone()[0]
+
+        for features_df in store.iter_features(_user_chunks(read_conn, chunk_size), reference_time):
+            chunk_ids = features_df['user_id'].to_numpy(dtype=np.int64)
+            probabilities = ml_engine.predict_proba(features_df[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+
+            with write_conn.cursor() as write_cursor:
+                write_cursor.copy_expert(
+                    COPY_PREDICTIONS_SQL,
+                    _predictions_csv(chunk_ids, probabilities, job.model_version, created_at)
+                )
+            write_conn.commit()
+            job.scored_users += len(chunk_ids)
+        read_conn.rollback()
+    finally:
+        read_conn.close()
+        write_conn.close()
+
+
+class BulkScorer:
+    """
+    Runs whole-user-base scoring jobs on a background thread, one at a time.
+    """
+
+    def __init__(self, chunk_size: int = 50_000):
+        self.chunk_size = chunk_size
+        self.jobs: Dict[str, ScoringJob] = {}
+        self._lock = threading.Lock()
+        self._running: Optional[ScoringJob] = None
+
+    def start(self) -> ScoringJob:
+        with self._lock:
+            if self._running is not None:
+                raise RuntimeError(f"Scoring job {self._running.job_id} is already running")
+            job = ScoringJob(uuid.uuid4().hex[:12])
+            self.jobs[job.job_id] = job
+            self._running = job
+
+        threading.Thread(target=self._run, args=(job,), name=f"bulk-scoring-{job.job_id}", daemon=True).start()
+        return job
+
+    def _run(self, job: ScoringJob):
+        job.status = "running"
+        job.started_at = datetime.now()
+        start = time.perf_counter()
+        try:
+            score_all_users(job, get_ml_engine(), self.chunk_size)
+            job.status = "completed"
+            elapsed = time.perf_counter() - start
+            logger.info(f"Scoring job {job.job_id}: {job.scored_users} users in {elapsed:.1f}s "
+                        f"({job.scored_users / max(elapsed, 1e-9):,.0f} users/s)")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Scoring job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                self._running = None
+
+    def get(self, job_id: str) -> Optional[ScoringJob]:
+        return self.jobs.get(job_id)
+
+
+_bulk_scorer: Optional[BulkScorer] = None
+
+
+def get_bulk_scorer() -> BulkScorer:
+    global _bulk_scorer
+    if _bulk_scorer is None:
+        _bulk_scorer = BulkScorer(settings.bulk_scoring_chunk_size)
+    return _bulk_scorer
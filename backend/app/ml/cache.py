@@ -0,0 +1,139 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[int, str, str]
+
+
+class PredictionCache:
+    """LRU + TTL cache keyed by (user_id, model_version, watermark), optionally shared through SQLite."""
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 300.0, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict]]" = OrderedDict()
+        self._user_keys: Dict[int, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS prediction_cache ("
+                " key TEXT PRIMARY KEY, user_id INTEGER NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_prediction_cache_user ON prediction_cache(user_id)")
+            self._db.execute("DELETE FROM prediction_cache WHERE expires_at <= ?", (time.time(),))
+
+    @staticmethod
+    def _db_key(key: CacheKey) -> str:
+        return "|".join(str(part) for part in key)
+
+    def _store_local(self, key: CacheKey, expires_at: float, value: Dict):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        self._user_keys.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._discard_user_key(old_key)
+            self.evictions += 1
+
+    def _discard_user_key(self, key: CacheKey):
+        keys = self._user_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[0]]
+
+    def get(self, key: CacheKey) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self._discard_user_key(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM prediction_cache WHERE key = ?", (self._db_key(key),)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store_local(key, row[1], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: CacheKey, value: Dict):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store_local(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO prediction_cache (key, user_id, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self._db_key(key), key[0], json.dumps(value, default=str), expires_at)
+                )
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in self._user_keys.pop(user_id, set()):
+                self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM prediction_cache WHERE user_id = ?", (user_id,))
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM prediction_cache")
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_prediction_cache: Optional[PredictionCache] = None
+
+
+def get_prediction_cache() -> PredictionCache:
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache(
+            max_entries=settings.prediction_cache_size,
+            ttl_seconds=settings.prediction_cache_ttl_seconds,
+            sqlite_path=settings.prediction_cache_sqlite_path
+        )
+    return _prediction_cache
@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from data.feature_engineering import FEATURE_COLUMNS, NAT_NS, NS_PER_DAY, SUBSCRIPTION_TIERS
+
+logger = logging.getLogger(__name__)
+
+
+def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class FeatureStoreReader:
+    """Memory-mapped, read-only view of the feature store, reloaded when meta.json changes."""
+
+    ARRAYS = ['user_ids', 'total_events', 'duration_sum', 'duration_count',
+              'last_event_ns', 'active_days', 'event_type_diversity']
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.meta: Dict = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._order: Optional[np.ndarray] = None
+        self._meta_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self):
+        meta_file = self.path / 'meta.json'
+        try:
+            mtime = meta_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._meta_mtime:
+            return
+
+        with self._lock:
+            if mtime == self._meta_mtime:
+                return
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+            snapshot_dir = self.path / meta['snapshot']
+            arrays = {name: np.load(snapshot_dir / f"{name}.npy", mmap_mode='r') for name in self.ARRAYS}
+            order = np.argsort(arrays['user_ids'])
+
+            self.meta, self._arrays, self._order = meta, arrays, order
+            self._meta_mtime = mtime
+            logger.info(f"Feature store loaded: {meta['snapshot']} (watermark event_id={meta['watermark_event_id']})")
+
+    @property
+    def available(self) -> bool:
+        self._reload_if_changed()
+        return bool(self._arrays)
+
+    @property
+    def watermark(self) -> int:
+        """
+        Last event_id folded into the active snapshot (0 when unavailable).
+        """
+        self._reload_if_changed()
+        return self.meta.get('watermark_event_id') or 0
+
+    def aggregates(self, user_id: int) -> Optional[Dict[str, float]]:
+        """Stored event aggregates for one user, or None if none are folded in yet."""
+        self._reload_if_changed()
+        arrays, order = self._arrays, self._order
+        if not arrays:
+            return None
+
+        user_ids = arrays['user_ids']
+        pos = np.searchsorted(user_ids, user_id, sorter=order)
+        if pos >= len(order) or user_ids[order[pos]] != user_id:
+            return None
+        row = order[pos]
+        return {name: arrays[name][row].item() for name in self.ARRAYS if name != 'user_ids'}
+
+    def feature_vector(self, user, reference_time: Optional[datetime] = None) -> List[float]:
+        """Model features for a User row in FEATURE_COLUMNS order, as ``build_feature_frame`` computes them."""
+        if reference_time is None:
+            reference_time = datetime.now(timezone.utc).replace(tzinfo=None)
+        agg = self.aggregates(user.user_id) or {}
+
+        last_seen = _to_naive_utc(user.last_active)
+        if last_seen is None and agg.get('last_event_ns', NAT_NS) != NAT_NS:
+            last_seen = datetime(1970, 1, 1) + timedelta(microseconds=agg['last_event_ns'] // 1000)
+        if last_seen is None:
+            last_seen = _to_naive_utc(user.created_at)
+        days_since = (reference_time - last_seen).total_seconds() / 86_400 if last_seen else 0.0
+
+        duration_count = agg.get('duration_count', 0)
+        avg_duration = agg['duration_sum'] / duration_count if duration_count else 0.0
+
+        tier = user.subscription_tier
+        tier_encoded = SUBSCRIPTION_TIERS.index(tier) if tier in SUBSCRIPTION_TIERS else 0
+
+        return [
+            float(days_since),
+            float(agg.get('total_events', 0)),
+            float(avg_duration),
+            float(agg.get('active_days', 0)),
+            float(tier_encoded),
+            float(agg.get('event_type_diversity', 0)),
+        ]
+
+
+_feature_store: Optional[FeatureStoreReader] = None
+
+
+def get_feature_store() -> FeatureStoreReader:
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStoreReader(settings.feature_store_path)
+    return _feature_store
@@ -0,0 +1,201 @@
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from app.config import settings
+from app.ml.features import FEATURE_COLUMNS
+from deployment.artifact import ARTIFACT_SUFFIX, load_artifact, read_header
+
+logger = logging.getLogger(__name__)
+
+DENSE_PATTERN = re.compile(r"^Dense_(\d+)$")
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': jax.nn.relu,
+    'gelu': jax.nn.gelu,
+    'tanh': jnp.tanh,
+    'sigmoid': jax.nn.sigmoid,
+}
+# Artifacts written before activations were recorded: a Dense+ReLU stack
+# emitting logits.
+DEFAULT_ACTIVATIONS = {'hidden': 'relu', 'output': 'linear'}
+
+
+def dense_layers(params: Dict) -> List[Dict]:
+    """
+    The Dense layers of a Flax MLP params tree, in application order.
+    """
+    layers = params.get('params', params)
+    indexed = []
+    for name, layer in layers.items():
+        match = DENSE_PATTERN.match(name)
+        if not match:
+            raise ValueError(f"Unsupported layer in model artifact: {name}")
+        indexed.append((int(match.group(1)), {'kernel': layer['kernel'], 'bias': layer['bias']}))
+    return [layer for _, layer in sorted(indexed, key=lambda item: item[0])]
+
+
+def model_activations(header: Dict) -> Tuple[str, str]:
+    """
+    (hidden, output) activation names recorded in an artifact header.
+    """
+    activations = header.get('activations') or DEFAULT_ACTIVATIONS
+    hidden, output = activations.get('hidden', 'relu'), activations.get('output', 'linear')
+    if hidden not in ACTIVATIONS:
+        raise ValueError(f"Unsupported hidden activation in model artifact: {hidden}")
+    if output not in ('linear', 'sigmoid'):
+        raise ValueError(f"Unsupported output activation in model artifact: {output}")
+    return hidden, output
+
+
+def mlp_forward(layers: List[Dict], x: jnp.ndarray, hidden: str = 'relu', output: str = 'linear') -> jnp.ndarray:
+    """Churn probabilities; a 'linear' output is a logit and goes through a sigmoid."""
+    for layer in layers[:-1]:
+        x = ACTIVATIONS[hidden](x @ layer['kernel'] + layer['bias'])
+    outputs = (x @ layers[-1]['kernel'] + layers[-1]['bias'])[:, 0]
+    return outputs if output == 'sigmoid' else jax.nn.sigmoid(outputs)
+
+
+def preprocess_and_forward(layers: List[Dict], mean: jnp.ndarray, std: jnp.ndarray, x: jnp.ndarray,
+                           hidden: str = 'relu', output: str = 'linear') -> jnp.ndarray:
+    """Standardize raw features as ``normalize_features`` does and run the MLP."""
+    return mlp_forward(layers, jnp.nan_to_num((x - mean) / std), hidden, output)
+
+
+def normalization_arrays(norm_params: Optional[Dict], feature_order: List[str]):
+    """(mean, std) float32 vectors in feature order; identity scaling without statistics."""
+    if not norm_params:
+        return np.zeros(len(feature_order), dtype=np.float32), np.ones(len(feature_order), dtype=np.float32)
+    mean = np.array([norm_params[col]['mean'] for col in feature_order], dtype=np.float32)
+    std = np.array([norm_params[col]['std'] for col in feature_order], dtype=np.float32)
+    return mean, np.where(std > 0, std, 1.0).astype(np.float32)
+
+
+def parse_buckets(value: str) -> List[int]:
+    return sorted({int(size) for size in value.split(",") if size.strip()})
+
+
+def configure_compilation_cache(cache_dir: Optional[str]):
+    """Persist every compiled XLA executable on disk so restarted replicas skip recompiling."""
+    if not cache_dir:
+        return
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    jax.config.update("jax_compilation_cache_dir", str(cache_dir))
+    jax.config.update("jax_persistent_cache_min_compile_time_secs", 0)
+    jax.config.update("jax_persistent_cache_min_entry_size_bytes", 0)
+    logger.info(f"JAX compilation cache: {cache_dir}")
+
+
+def find_latest_model(model_dir: str) -> Path:
+    """
+    Newest artifact in ``model_dir`` by the trained_at recorded in its header.
+    """
+    candidates = sorted(Path(model_dir).glob(f"model_*{ARTIFACT_SUFFIX}"))
+    if not candidates:
+        raise FileNotFoundError(f"No model artifacts in {model_dir}")
+    return max(candidates, key=lambda path: read_header(str(path)).get('trained_at', ''))
+
+
+class MLEngine:
+    """
+    Serves churn predictions from a memory-mapped model artifact.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, buckets: Optional[List[int]] = None):
+        path = Path(model_path) if model_path else find_latest_model(settings.model_storage_path)
+        params, header = load_artifact(str(path))
+
+        feature_order = header.get('feature_order', FEATURE_COLUMNS)
+        if feature_order != FEATURE_COLUMNS:
+            raise ValueError(f"Model {header['version']} expects features {feature_order}, backend provides {FEATURE_COLUMNS}")
+
+        self.model_path = str(path)
+        self.header = header
+        self.current_version: str = header['version']
+        self.metrics: Dict = header.get('metrics', {})
+        if not header.get('norm_params'):
+            logger.warning(f"Model {self.current_version} has no normalization statistics; using raw features")
+        mean, std = normalization_arrays(header.get('norm_params'), feature_order)
+        if 'activations' not in header:
+            logger.warning(f"Model {self.current_version} records no activations; assuming {DEFAULT_ACTIVATIONS}")
+        hidden, output = model_activations(header)
+
+        self._layers = jax.device_put(dense_layers(params))
+        self._mean = jax.device_put(mean)
+        self._std = jax.device_put(std)
+        self._forward = jax.jit(partial(preprocess_and_forward, hidden=hidden, output=output))
+        self.buckets = sorted(buckets or parse_buckets(settings.inference_buckets))
+        self._compiled: Dict[int, object] = {}
+        self.compile_times: Dict[int, float] = {}
+
+        logger.info(f"Loaded model {self.current_version} from {self.model_path}")
+
+    def bucket_size(self, n_rows: int) -> int:
+        for size in self.buckets:
+            if n_rows <= size:
+                return size
+        return self.buckets[-1]
+
+    def compile(self) -> Dict[int, float]:
+        """Compile the forward pass ahead of time for every bucket size; returns seconds per bucket."""
+        n_features = len(FEATURE_COLUMNS)
+        for size in self.buckets:
+            start = time.perf_counter()
+            x_spec = jax.ShapeDtypeStruct((size, n_features), jnp.float32)
+            self._compiled[size] = self._forward.lower(self._layers, self._mean, self._std, x_spec).compile()
+            self.compile_times[size] = time.perf_counter() - start
+            logger.info(f"Model {self.current_version}: compiled batch size {size} "
+                        f"in {self.compile_times[size] * 1000:.1f} ms")
+        return self.compile_times
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Churn probabilities for raw (n, len(FEATURE_COLUMNS)) features, zero-padded to bucket sizes."""
+        x = np.asarray(features, dtype=np.float32).reshape(-1, len(FEATURE_COLUMNS))
+        probabilities = np.empty(len(x), dtype=np.float32)
+
+        for start in range(0, len(x), self.buckets[-1]):
+            chunk = x[start:start + self.buckets[-1]]
+            padded = np.zeros((self.bucket_size(len(chunk)), x.shape[1]), dtype=np.float32)
+            padded[:len(chunk)] = chunk
+            forward = self._compiled.get(len(padded), self._forward)
+            output = forward(self._layers, self._mean, self._std, padded)
+            probabilities[start:start + len(chunk)] = np.asarray(output)[:len(chunk)]
+
+        return probabilities
+
+    def predict(self, features: List[float]) -> float:
+        return float(self.predict_proba(np.asarray([features]))[0])
+
+
+_ml_engine: Optional[MLEngine] = None
+_ml_engine_lock = threading.Lock()
+
+
+def get_ml_engine() -> MLEngine:
+    global _ml_engine
+    if _ml_engine is None:
+        with _ml_engine_lock:
+            if _ml_engine is None:
+                engine = MLEngine()
+                engine.compile()
+                _ml_engine = engine
+    return _ml_engine
+
+
+def current_ml_engine() -> Optional[MLEngine]:
+    return _ml_engine
+
+
+def set_ml_engine(engine: MLEngine):
+    """Publish a compiled engine; callers holding the old one finish on it."""
+    global _ml_engine
+    _ml_engine = engine
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.database import SessionLocal
+from app.ml.cache import get_prediction_cache
+from app.ml.inference import MLEngine, current_ml_engine, set_ml_engine
+from app.models import ModelMetadata
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_model_path(model_path: str) -> Path:
+    """The recorded path, or the file of the same name under ``model_storage_path``."""
+    path = Path(model_path)
+    if path.exists():
+        return path
+    return Path(settings.model_storage_path) / path.name
+
+
+def active_model_from_db() -> Optional[Tuple[str, str]]:
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(ModelMetadata)
+            .filter(ModelMetadata.is_active.is_(True))
+            .order_by(ModelMetadata.deployed_at.desc(), ModelMetadata.model_id.desc())
+            .first()
+        )
+        if row is None or not row.storage_path:
+            return None
+        return row.version, row.storage_path
+    finally:
+        db.close()
+
+
+def active_model_from_registry(registry_path: Path) -> Optional[Tuple[str, str]]:
+    if not registry_path.exists():
+        return None
+    with open(registry_path, 'r') as f:
+        registry = json.load(f)
+
+    active = registry.get("active")
+    if not active:
+        return None
+    for model in registry.get("models", []):
+        if model["version"] == active["version"]:
+            return model["version"], model["model_path"]
+    return None
+
+
+def resolve_active_model() -> Optional[Tuple[str, str]]:
+    """(version, artifact path) of the activated model, from model_metadata or the file registry."""
+    try:
+        active = active_model_from_db()
+        if active:
+            return active
+    except Exception as e:
+        logger.debug(f"model_metadata lookup failed: {e}")
+    return active_model_from_registry(Path(settings.model_storage_path) / "registry.json")
+
+
+class ModelWatcher:
+    """Polls for a newly activated model version and hot-swaps it in, retrying failed loads with backoff."""
+
+    def __init__(self, poll_interval: float = 10.0, max_retry_interval: float = 600.0):
+        self.poll_interval = poll_interval
+        self.max_retry_interval = max_retry_interval
+        self.pending_version: Optional[str] = None
+        self._failed_version: Optional[str] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def _record_failure(self, version: str):
+        if version != self._failed_version:
+            self._failed_version, self._failures = version, 0
+        self._failures += 1
+        delay = min(self.poll_interval * 2 ** (self._failures - 1), self.max_retry_interval)
+        self._retry_at = time.monotonic() + delay
+        logger.info(f"Retrying model {version} in {delay:.0f}s (attempt {self._failures + 1})")
+
+    def check(self) -> bool:
+        """Publish the active version if it is not the one serving; returns True if it did. Blocking."""
+        active = resolve_active_model()
+        if active is None:
+            return False
+
+        version, model_path = active
+        engine = current_ml_engine()
+        if engine is not None and engine.current_version == version:
+            return False
+        if version == self._failed_version and time.monotonic() < self._retry_at:
+            return False
+
+        self.pending_version = version
+        try:
+            logger.info(f"Loading model {version} from {model_path}")
+            new_engine = MLEngine(str(_resolve_model_path(model_path)))
+            new_engine.compile()
+        except Exception as e:
+            logger.error(f"Failed to load model {version}: {e}")
+            self._record_failure(version)
+            return False
+        finally:
+            self.pending_version = None
+
+        set_ml_engine(new_engine)
+        get_prediction_cache().clear()
+        self._failed_version, self._failures = None, 0
+        previous = engine.current_version if engine else None
+        logger.info(f"Swapped model {previous} -> {version}")
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await loop.run_in_executor(None, self.check)
+            except Exception as e:
+                logger.error(f"Model watcher check failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_watcher: Optional[ModelWatcher] = None
+
+
+def get_model_watcher() -> ModelWatcher:
+    global _watcher
+    if _watcher is None:
+        _watcher = ModelWatcher(settings.model_poll_interval_seconds, settings.model_retry_max_seconds)
+    return _watcher
@@ -0,0 +1,208 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal, get_async_db
+from app.ml.inference import current_ml_engine
+from app.models import ModelMetadata
+from app.schemas import AnalyticsResponse, PredictionTimeline, UserAnalytics
+
+router = APIRouter()
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Trigger-maintained counters (see analytics_counters in database/schema.sql):
+# a handful of shard rows regardless of table sizes.
+COUNTERS_SQL = text("SELECT name, SUM(value) FROM analytics_counters GROUP BY name")
+
+TIMELINE_SQL = text("""
+    SELECT
+        date_trunc('day', hour)::date AS date,
+        SUM(predicted_value_sum) / NULLIF(SUM(prediction_count), 0) AS avg_churn_probability,
+        SUM(prediction_count) AS prediction_count
+    FROM prediction_hourly
+    WHERE hour >= :since
+    GROUP BY 1
+    HAVING SUM(prediction_count) > 0
+    ORDER BY 1
+""")
+
+# Reads the trigger-maintained user_rollup; the latest prediction is one
+# index probe on (user_id, created_at DESC) per returned user.
+USER_ANALYTICS_SELECT = """
+    SELECT
+        u.user_id,
+        u.email,
+        u.subscription_tier,
+        u.churned,
+        EXTRACT(DAY FROM (NOW() - u.last_active)) AS days_since_last_active,
+        COALESCE(r.total_events, 0) AS total_events,
+        COALESCE(r.active_days, 0) AS active_days,
+        r.session_duration_sum / NULLIF(r.session_duration_count, 0) AS avg_session_duration,
+        p.predicted_value AS latest_churn_prediction
+    FROM users u
+    LEFT JOIN user_rollup r ON r.user_id = u.user_id
+    LEFT JOIN LATERAL (
+        SELECT predicted_value
+        FROM predictions
+        WHERE user_id = u.user_id
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) p ON TRUE
+"""
+
+# Keyset page: a primary key range scan, however deep the page.
+USER_ANALYTICS_SQL = text(USER_ANALYTICS_SELECT + """
+    WHERE u.user_id > :after
+    ORDER BY u.user_id
+    LIMIT :limit
+""")
+
+USER_ANALYTICS_OFFSET_SQL = text(USER_ANALYTICS_SELECT + """
+    ORDER BY u.user_id
+    LIMIT :limit OFFSET :skip
+""")
+
+USER_EXPORT_SQL = text(USER_ANALYTICS_SELECT + """
+    ORDER BY u.user_id
+""")
+
+EXPORT_COLUMNS = list(UserAnalytics.model_fields)
+
+
+async def _serving_model(db: AsyncSession):
+    """
+    (version, accuracy) of the active model, falling back to the engine
+    currently loaded in this process.
+    """
+    result = await db.execute(
+        select(ModelMetadata)
+        .where(ModelMetadata.is_active.is_(True))
+        .order_by(ModelMetadata.deployed_at.desc(), ModelMetadata.model_id.desc())
+        .limit(1)
+    )
+    active = result.scalars().first()
+    if active is not None:
+        return active.version, active.accuracy
+    engine = current_ml_engine()
+    if engine is not None:
+        return engine.current_version, engine.metrics.get('accuracy')
+    return "unavailable", None
+
+
+@router.get("/", response_model=AnalyticsResponse)
+async def get_analytics(db: AsyncSession = Depends(get_async_db)):
+    """
+    Dashboard summary from the rollup counters; cost does not grow with
+    the users or predictions tables. Active users are those not churned.
+    """
+    counters: Dict[str, float] = dict((await db.execute(COUNTERS_SQL)).all())
+    total_users = int(counters.get('users_total', 0))
+    churned_users = int(counters.get('users_churned', 0))
+    total_predictions = int(counters.get('predictions_total', 0))
+    model_version, model_accuracy = await _serving_model(db)
+
+    return AnalyticsResponse(
+        total_users=total_users,
+        active_users=total_users - churned_users,
+        churned_users=churned_users,
+        churn_rate=churned_users / total_users if total_users else 0.0,
+        avg_churn_probability=(
+            counters.get('predictions_value_sum', 0.0) / total_predictions if total_predictions else 0.0
+        ),
+        model_version=model_version,
+        model_accuracy=model_accuracy,
+        total_predictions=total_predictions
+    )
+
+
+@router.get("/predictions/timeline", response_model=List[PredictionTimeline])
+async def get_prediction_timeline(days: int = Query(30, ge=1, le=365), db: AsyncSession = Depends(get_async_db)):
+    """
+    Daily average churn probability and prediction count, summed from the
+    hourly prediction buckets.
+    """
+    since = (datetime.now() - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+    rows = (await db.execute(TIMELINE_SQL, {"since": since})).mappings().all()
+    return [PredictionTimeline(**row) for row in rows]
+
+
+@router.get("/users", response_model=List[UserAnalytics])
+async def get_user_analytics(
+    response: Response,
+    after: Optional[int] = Query(None, ge=0, description="Return users with user_id greater than this cursor"),
+    skip: int = Query(0, ge=0, description="Offset paging; ignored when after is given"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    One page of per-user analytics ordered by user_id. Pass the
+    ``X-Next-Cursor`` response header back as ``after`` for the next page;
+    the header is absent on the last page.
+    """
+    if after is None and skip:
+        result = await db.execute(USER_ANALYTICS_OFFSET_SQL, {"skip": skip, "limit": limit})
+    else:
+        result = await db.execute(USER_ANALYTICS_SQL, {"after": after or 0, "limit": limit})
+    users = [UserAnalytics(**row) for row in result.mappings().all()]
+    if len(users) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(users[-1].user_id)
+    return users
+
+
+def _ndjson_lines(rows: List[Dict]) -> str:
+    return "".join(UserAnalytics(**row).model_dump_json() + "\n" for row in rows)
+
+
+def _csv_lines(rows: List[Dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(UserAnalytics(**row).model_dump().values())
+    return buffer.getvalue()
+
+
+def _csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue()
+
+
+async def _stream_user_analytics(encode, header: str = "") -> AsyncIterator[str]:
+    """
+    Rows from a server-side cursor, encoded and yielded one fetch batch at a
+    time so memory stays flat however many users there are. The session is
+    owned by the generator because it outlives the endpoint call.
+    """
+    if header:
+        yield header
+    batch_size = settings.analytics_export_batch_size
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(USER_EXPORT_SQL, execution_options={"yield_per": batch_size})
+        async for rows in result.mappings().partitions(batch_size):
+            yield encode(rows)
+
+
+@router.get("/users/export")
+async def export_user_analytics(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Every user's analytics as a streamed NDJSON or CSV download.
+    """
+    if format == "csv":
+        body = _stream_user_analytics(_csv_lines, _csv_header())
+        media_type = "text/csv"
+    else:
+        body = _stream_user_analytics(_ndjson_lines)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="user_analytics.{format}"'}
+    )
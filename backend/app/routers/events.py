@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_async_db
+from app.event_buffer import EVENT_BATCH, BufferFull, get_event_buffer
+from app.ml.cache import get_prediction_cache
+from app.models import Event, User
+from app.schemas import EventBulkResponse, EventCreate, EventResponse
+
+router = APIRouter()
+
+BULK_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/EventCreate"}}
+            }
+        }
+    }
+}
+
+
+@router.post("/", response_model=EventResponse, status_code=201)
+async def create_event(event: EventCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Record one event in its own transaction; use /bulk for high-volume ingest.
+    """
+    user = await db.get(User, event.user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User {event.user_id} not found")
+
+    db_event = Event(**event.model_dump())
+    db.add(db_event)
+    user.last_active = func.now()
+    await db.commit()
+    await db.refresh(db_event)
+    get_prediction_cache().invalidate_user(event.user_id)
+    return db_event
+
+
+@router.post("/bulk", response_model=EventBulkResponse, status_code=202, openapi_extra=BULK_REQUEST_BODY)
+async def ingest_events(request: Request):
+    """
+    Accept a batch of events into the write-behind buffer. The response is
+    sent once the batch is in the local WAL; events reach the database
+    within one flush interval. Returns 503 with Retry-After while the
+    buffer is full.
+    """
+    # Parsed and validated in one pass by pydantic-core rather than
+    # json.loads followed by model validation.
+    try:
+        events = EVENT_BATCH.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+    try:
+        accepted = await run_in_threadpool(get_event_buffer().append, events)
+    except BufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return EventBulkResponse(accepted=accepted)
+
+
+@router.get("/buffer/stats")
+def event_buffer_stats():
+    return get_event_buffer().stats()
@@ -0,0 +1,218 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_async_db
+from app.ml.batching import get_batcher
+from app.ml.bulk_scoring import get_bulk_scorer
+from app.ml.cache import CacheKey, get_prediction_cache
+from app.ml.features import FEATURE_COLUMNS, get_feature_store
+from app.ml.inference import get_ml_engine
+from app.models import Prediction, User
+from app.schemas import PredictionRequest, PredictionResponse, ScoringJobResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _load_user(db: AsyncSession, user_id: int) -> User:
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+    return user
+
+
+def _cache_key(user: User, model_version: str) -> CacheKey:
+    """
+    (user_id, model_version, watermark). The watermark changes whenever new
+    events reach the user's features: ``last_active`` moves on ingest and
+    the feature store watermark moves on refresh.
+    """
+    last_active = user.last_active.isoformat() if user.last_active else ""
+    return user.user_id, model_version, f"{last_active}@{get_feature_store().watermark}"
+
+
+async def _serving_version() -> str:
+    """
+    Version of the serving model. The first call loads and compiles it,
+    so the lookup runs on a worker thread; no loadable model is a 503.
+    """
+    try:
+        return (await run_in_threadpool(get_ml_engine)).current_version
+    except Exception as e:
+        logger.error(f"Model unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Model unavailable")
+
+
+def _lookup(user: User, model_version: str) -> Tuple[CacheKey, Optional[Dict], Optional[List[float]]]:
+    """
+    (cache key, cached response, features on a miss). Blocking: the cache
+    may go to SQLite and the feature store may reload its snapshot, so
+    callers run it on a worker thread.
+    """
+    cache_key = _cache_key(user, model_version)
+    cached = get_prediction_cache().get(cache_key)
+    if cached is not None:
+        return cache_key, cached, None
+    return cache_key, None, get_feature_store().feature_vector(user)
+
+
+def _cache_responses(entries: List[Tuple[CacheKey, Dict]]):
+    cache = get_prediction_cache()
+    for cache_key, value in entries:
+        cache.set(cache_key, value)
+
+
+async def _store_prediction(db: AsyncSession, user_id: int, probability: float, confidence: float,
+                            model_version: str, features: List[float]) -> Prediction:
+    prediction = Prediction(
+        user_id=user_id,
+        model_version=model_version,
+        prediction_type="churn",
+        predicted_value=probability,
+        confidence=confidence,
+        features=dict(zip(FEATURE_COLUMNS, features))
+    )
+    db.add(prediction)
+    await db.commit()
+    await db.refresh(prediction)
+    return prediction
+
+
+@router.post("/", response_model=PredictionResponse)
+async def predict_churn(request: PredictionRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Churn probability for one user. The forward pass is shared with other
+    in-flight requests through the micro-batcher; database round trips are
+    awaited so the event loop keeps collecting requests.
+    """
+    user = await _load_user(db, request.user_id)
+    current_version = await _serving_version()
+    cache_key, cached, features = await run_in_threadpool(_lookup, user, current_version)
+    if cached is not None:
+        return PredictionResponse(**cached)
+
+    try:
+        probabilities, model_version = await get_batcher().predict(features)
+    except Exception as e:
+        logger.error(f"Prediction failed for user {request.user_id}: {e}")
+        raise HTTPException(status_code=503, detail="Model unavailable")
+
+    probability = float(probabilities[0])
+    confidence = max(probability, 1.0 - probability)
+    prediction = await _store_prediction(
+        db, request.user_id, probability, confidence, model_version, features
+    )
+
+    response = PredictionResponse(
+        user_id=request.user_id,
+        prediction=probability,
+        confidence=confidence,
+        model_version=model_version,
+        created_at=prediction.created_at
+    )
+    if model_version == cache_key[1]:
+        await run_in_threadpool(_cache_responses, [(cache_key, response.model_dump(mode="json"))])
+    return response
+
+
+async def _load_users(db: AsyncSession, user_ids: List[int]) -> List[User]:
+    users = (await db.execute(select(User).where(User.user_id.in_(user_ids)))).scalars().all()
+    by_id = {user.user_id: user for user in users}
+    return [by_id[user_id] for user_id in dict.fromkeys(user_ids) if user_id in by_id]
+
+
+async def _store_predictions(db: AsyncSession, predictions: List[Prediction]):
+    await db.run_sync(lambda session: session.bulk_save_objects(predictions))
+    await db.commit()
+
+
+@router.post("/batch", response_model=List[PredictionResponse])
+async def batch_predict(user_ids: List[int], db: AsyncSession = Depends(get_async_db)):
+    """
+    Churn probabilities for a list of users: one user query, then cached
+    scores where available and one forward pass plus one bulk insert for
+    the rest. Unknown user IDs are skipped. Use the scoring job below for
+    the whole user base.
+    """
+    users = await _load_users(db, user_ids)
+    if not users:
+        return []
+    current_version = await _serving_version()
+    lookups = await run_in_threadpool(lambda: [_lookup(user, current_version) for user in users])
+
+    responses: Dict[int, PredictionResponse] = {}
+    misses = []
+    for user, (cache_key, cached, features) in zip(users, lookups):
+        if cached is not None:
+            responses[user.user_id] = PredictionResponse(**cached)
+        else:
+            misses.append((user.user_id, cache_key, features))
+
+    if misses:
+        try:
+            probabilities, model_version = await get_batcher().predict([features for _, _, features in misses])
+        except Exception as e:
+            logger.error(f"Batch prediction failed for {len(misses)} users: {e}")
+            raise HTTPException(status_code=503, detail="Model unavailable")
+
+        created_at = datetime.now()
+        predictions = []
+        to_cache = []
+        for (user_id, cache_key, features), probability in zip(misses, probabilities.tolist()):
+            confidence = max(probability, 1.0 - probability)
+            predictions.append(Prediction(
+                user_id=user_id,
+                model_version=model_version,
+                prediction_type="churn",
+                predicted_value=probability,
+                confidence=confidence,
+                features=dict(zip(FEATURE_COLUMNS, features)),
+                created_at=created_at
+            ))
+            response = PredictionResponse(
+                user_id=user_id,
+                prediction=probability,
+                confidence=confidence,
+                model_version=model_version,
+                created_at=created_at
+            )
+            responses[user_id] = response
+            if model_version == cache_key[1]:
+                to_cache.append((cache_key, response.model_dump(mode="json")))
+
+        await _store_predictions(db, predictions)
+        await run_in_threadpool(_cache_responses, to_cache)
+
+    return [responses[user.user_id] for user in users]
+
+
+@router.get("/cache/stats")
+def prediction_cache_stats():
+    return get_prediction_cache().stats()
+
+
+@router.post("/jobs", response_model=ScoringJobResponse, status_code=202)
+def start_scoring_job():
+    """
+    Score every user in the background; poll the returned job for progress.
+    """
+    try:
+        job = get_bulk_scorer().start()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=ScoringJobResponse)
+def get_scoring_job(job_id: str):
+    job = get_bulk_scorer().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Scoring job {job_id} not found")
+    return job.to_dict()
@@ -1,7 +1,20 @@
-from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import date, datetime
 from typing import Optional, Dict, Any, List
 
+# Bounds of the events columns (user_id INTEGER, event_type VARCHAR(100)).
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+EVENT_TYPE_MAX_LENGTH = 100
+
+
+def _contains_nul(value: Any) -> bool:
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_contains_nul(k) or _contains_nul(v) for k, v in value.items())
+    if isinstance(value, list):
+        return any(_contains_nul(v) for v in value)
+    return False
 
               
 class UserBase(BaseModel):
@@ -25,11 +38,19 @@ class UserResponse(UserBase):
 
                
 class EventCreate(BaseModel):
-    user_id: int
-    event_type: str
+    user_id: int = Field(..., ge=INT32_MIN, le=INT32_MAX)
+    event_type: str = Field(..., max_length=EVENT_TYPE_MAX_LENGTH)
     event_data: Optional[Dict[str, Any]] = None
     session_duration: Optional[float] = None
 
+    @field_validator("event_type", "event_data")
+    @classmethod
+    def reject_nul(cls, value):
+        # Postgres text and jsonb cannot store U+0000.
+        if _contains_nul(value):
+            raise ValueError("must not contain NUL (\\u0000) characters")
+        return value
+
 
 class EventResponse(BaseModel):
     event_id: int
@@ -43,6 +64,10 @@ class EventResponse(BaseModel):
         from_attributes = True
 
 
+class EventBulkResponse(BaseModel):
+    accepted: int
+
+
                     
 class PredictionRequest(BaseModel):
     user_id: int
@@ -59,6 +84,19 @@ class PredictionResponse(BaseModel):
         from_attributes = True
 
 
+class ScoringJobResponse(BaseModel):
+    job_id: str
+    status: str
+    model_version: Optional[str] = None
+    total_users: int
+    scored_users: int
+    progress: float
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
 class PredictionHistory(BaseModel):
     prediction_id: int
     user_id: int
@@ -83,6 +121,12 @@ class AnalyticsResponse(BaseModel):
     total_predictions: int
 
 
+class PredictionTimeline(BaseModel):
+    date: date
+    avg_churn_probability: float
+    prediction_count: int
+
+
 class UserAnalytics(BaseModel):
     user_id: int
     email: str
@@ -0,0 +1,132 @@
+"""Sync SessionLocal endpoints vs. async asyncpg endpoints, in-process through the ASGI app."""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from common import write_results
+from app.config import settings
+from app.database import ASYNC_POOL, async_engine, get_async_db
+from app.routers.analytics import USER_ANALYTICS_SQL
+
+SLEEP_SQL = text("SELECT pg_sleep(:seconds)")
+
+# The app's sync engine only has the small background share of the
+# budget, so the sync path gets its own engine sized like the async pool.
+engine = create_engine(
+    settings.database_url,
+    pool_pre_ping=True,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    **ASYNC_POOL
+)
+BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def get_db():
+    db = BenchSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def build_app(rtt_seconds: float) -> FastAPI:
+    app = FastAPI()
+    page = {"after": 0, "limit": 100}
+
+    @app.get("/sync/users_page")
+    def sync_users_page(db: Session = Depends(get_db)):
+        return len(db.execute(USER_ANALYTICS_SQL, page).all())
+
+    @app.get("/async/users_page")
+    async def async_users_page(db: AsyncSession = Depends(get_async_db)):
+        return len((await db.execute(USER_ANALYTICS_SQL, page)).all())
+
+    @app.get("/sync/remote_rtt")
+    def sync_remote_rtt(db: Session = Depends(get_db)):
+        db.execute(SLEEP_SQL, {"seconds": rtt_seconds})
+        return 1
+
+    @app.get("/async/remote_rtt")
+    async def async_remote_rtt(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(SLEEP_SQL, {"seconds": rtt_seconds})
+        return 1
+
+    return app
+
+
+async def run_load(client: httpx.AsyncClient, path: str, concurrency: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(path)
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def benchmark(args) -> List[Dict]:
+    app = build_app(args.rtt_ms / 1000)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for query in args.queries:
+            for concurrency in args.concurrency:
+                for mode in ('sync', 'async'):
+                    path = f"/{mode}/{query}"
+                    await run_load(client, path, concurrency, min(1.0, args.duration))
+                    result = await run_load(client, path, concurrency, args.duration)
+                    result.update(query=query, mode=mode, concurrency=concurrency,
+                                  pool_size=ASYNC_POOL['pool_size'], max_overflow=ASYNC_POOL['max_overflow'])
+                    rows.append(result)
+                    print(f"{query:>11} {concurrency:>5} {mode:>6} {result['throughput_rps']:>10,.0f} "
+                          f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>7}")
+    await async_engine.dispose()
+    engine.dispose()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', nargs='+', default=['users_page', 'remote_rtt'],
+                        choices=['users_page', 'remote_rtt'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 64, 256])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rtt-ms', type=float, default=5.0)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    print(f"{'query':>11} {'conc':>5} {'mode':>6} {'req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    rows = asyncio.run(benchmark(args))
+    write_results('async_db', rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
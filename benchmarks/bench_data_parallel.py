@@ -0,0 +1,86 @@
+"""Data-parallel training throughput vs. the number of XLA devices."""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import write_results
+
+
+def run_worker(n_samples: int, batch_size: int, epochs: int, seed: int):
+    import jax
+    import jax.numpy as jnp
+    import numpy as np
+    from jax.sharding import NamedSharding, PartitionSpec as P
+
+    from models.jax_classifier import ChurnPredictor
+    from training.train import create_train_state, data_parallel_mesh, train_epoch
+
+    rng = np.random.default_rng(seed)
+    X = jnp.asarray(rng.normal(size=(n_samples, 6)), dtype=jnp.float32)
+    y = jnp.asarray(rng.random(n_samples) < 0.3, dtype=jnp.float32)
+
+    key = jax.random.PRNGKey(seed)
+    state = create_train_state(key, ChurnPredictor(), 0.001, input_shape=(1, 6))
+
+    mesh = data_parallel_mesh() if len(jax.local_devices()) > 1 else None
+    if mesh is not None:
+        state, X, y = jax.device_put((state, X, y), NamedSharding(mesh, P()))
+
+    state, losses = train_epoch(state, X, y, key, batch_size, mesh)
+    losses.block_until_ready()
+
+    start = time.perf_counter()
+    for epoch in range(epochs):
+        state, losses = train_epoch(state, X, y, jax.random.fold_in(key, epoch), batch_size, mesh)
+    losses.block_until_ready()
+    elapsed = time.perf_counter() - start
+
+    trained = (n_samples // batch_size) * batch_size * epochs
+    print(json.dumps({
+        'devices': len(jax.local_devices()),
+        'samples_per_sec': trained / elapsed,
+        'epoch_s': elapsed / epochs,
+        'final_loss': float(losses.mean()),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--samples', type=int, default=262_144)
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.samples, args.batch_size, args.epochs, args.seed)
+        return
+
+    rows = []
+    print(f"{'devices':>8} {'samples/sec':>14} {'epoch (s)':>10} {'speedup':>8}")
+    for n_devices in args.devices:
+        env = dict(os.environ, XLA_FLAGS=f"--xla_force_host_platform_device_count={n_devices}")
+        output = subprocess.check_output(
+            [sys.executable, __file__, '--worker',
+             '--samples', str(args.samples),
+             '--batch-size', str(args.batch_size),
+             '--epochs', str(args.epochs),
+             '--seed', str(args.seed)],
+            env=env, text=True
+        )
+        row = json.loads(output.strip().splitlines()[-1])
+        row['speedup'] = row['samples_per_sec'] / rows[0]['samples_per_sec'] if rows else 1.0
+        rows.append(row)
+        print(f"{row['devices']:>8} {row['samples_per_sec']:>14,.0f} {row['epoch_s']:>10.3f} {row['speedup']:>7.2f}x")
+
+    write_results('data_parallel', rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Feature engineering: pandas group-by vs. the columnar engine in ml_pipeline/data/feature_engineering.py."""
+import argparse
+import gc
+
+import numpy as np
+import pandas as pd
+
+from common import timer, write_results
+from data.feature_engineering import (
+    FEATURE_COLUMNS,
+    SUBSCRIPTION_TIERS,
+    extract_user_features,
+)
+
+EVENT_TYPES = [
+    'login', 'page_view', 'feature_usage', 'purchase', 'support_ticket',
+    'settings_change', 'export_data', 'share_content', 'api_call', 'logout'
+]
+
+REFERENCE_TIME = pd.Timestamp('2024-06-01')
+
+
+def generate_data(n_events: int, events_per_user: int = 200, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    n_users = max(1, n_events // events_per_user)
+
+    users_df = pd.DataFrame({
+        'user_id': np.arange(1, n_users + 1, dtype=np.int64),
+        'created_at': REFERENCE_TIME - pd.to_timedelta(rng.integers(30, 730, n_users), unit='D'),
+        'last_active': REFERENCE_TIME - pd.to_timedelta(rng.integers(0, 90 * 86_400, n_users), unit='s'),
+        'subscription_tier': pd.Categorical.from_codes(rng.integers(0, 4, n_users), SUBSCRIPTION_TIERS),
+        'churned': rng.random(n_users) < 0.3,
+    })
+
+    events_df = pd.DataFrame({
+        'user_id': rng.integers(1, n_users + 1, n_events, dtype=np.int64),
+        'event_type': pd.Categorical.from_codes(rng.integers(0, len(EVENT_TYPES), n_events), EVENT_TYPES),
+        'session_duration': rng.uniform(1.0, 60.0, n_events),
+        'timestamp': REFERENCE_TIME - pd.to_timedelta(rng.integers(0, 365 * 86_400, n_events), unit='s'),
+    })
+    return users_df, events_df
+
+
+def extract_user_features_pandas(users_df: pd.DataFrame, events_df: pd.DataFrame, reference_time) -> pd.DataFrame:
+    """
+    DataFrame group-by implementation used as the baseline.
+    """
+    events = events_df.assign(day=events_df['timestamp'].dt.floor('D'))
+    grouped = events.groupby('user_id', observed=True)
+    agg = pd.DataFrame({
+        'total_events': grouped.size(),
+        'avg_session_duration': grouped['session_duration'].mean(),
+        'active_days': grouped['day'].nunique(),
+        'event_type_diversity': grouped['event_type'].nunique(),
+        'last_event_time': grouped['timestamp'].max(),
+    })
+
+    df = users_df.merge(agg, left_on='user_id', right_index=True, how='left')
+    last_seen = df['last_active'].fillna(df['last_event_time']).fillna(df['created_at'])
+    df['days_since_last_active'] = (reference_time - last_seen) / pd.Timedelta(days=1)
+    df['total_events'] = df['total_events'].fillna(0).astype(np.int64)
+    df['avg_session_duration'] = df['avg_session_duration'].fillna(0.0)
+    df['active_days'] = df['active_days'].fillna(0).astype(np.int64)
+    df['event_type_diversity'] = df['event_type_diversity'].fillna(0).astype(np.int64)
+    df['subscription_tier_encoded'] = df['subscription_tier'].map(
+        {tier: i for i, tier in enumerate(SUBSCRIPTION_TIERS)}
+    ).fillna(0).astype(np.int64)
+    df['churned'] = df['churned'].astype(np.int64)
+    return df[['user_id'] + FEATURE_COLUMNS + ['churned']].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000, 100_000_000])
+    parser.add_argument('--skip-pandas-above', type=int, default=None,
+                        help='Only time the vectorized engine for larger event counts')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    rows = []
+    print(f"{'events':>12} {'users':>10} {'pandas (s)':>12} {'columnar (s)':>13} {'speedup':>8}")
+    for n_events in args.sizes:
+        users_df, events_df = generate_data(n_events, seed=args.seed)
+        timings = {}
+
+        with timer(timings, 'columnar'):
+            fast = extract_user_features(users_df, events_df, REFERENCE_TIME)
+
+        if args.skip_pandas_above is None or n_events <= args.skip_pandas_above:
+            with timer(timings, 'pandas'):
+                slow = extract_user_features_pandas(users_df, events_df, REFERENCE_TIME)
+            pd.testing.assert_frame_equal(fast, slow, check_dtype=False)
+            del slow
+
+        row = {
+            'n_events': n_events,
+            'n_users': len(users_df),
+            'pandas_s': timings.get('pandas'),
+            'columnar_s': timings['columnar'],
+        }
+        if row['pandas_s'] is not None:
+            row['speedup'] = row['pandas_s'] / row['columnar_s']
+        rows.append(row)
+
+        pandas_col = f"{row['pandas_s']:.2f}" if row['pandas_s'] is not None else 'skipped'
+        speedup_col = f"{row['speedup']:.1f}x" if 'speedup' in row else '-'
+        print(f"{n_events:>12,} {len(users_df):>10,} {pandas_col:>12} {timings['columnar']:>13.2f} {speedup_col:>8}")
+
+        del users_df, events_df, fast
+        gc.collect()
+
+    write_results('feature_engineering', rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
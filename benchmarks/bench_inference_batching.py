@@ -0,0 +1,123 @@
+"""Serving latency: one forward pass per request vs. the async micro-batcher."""
+import argparse
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from common import write_results
+from deployment.artifact import save_artifact
+from data.feature_engineering import FEATURE_COLUMNS
+from app.ml.batching import MicroBatcher
+from app.ml.inference import MLEngine
+
+LAYER_SIZES = [len(FEATURE_COLUMNS), 64, 32, 1]
+
+
+def write_random_model(path: Path, seed: int, norm_params: Dict = None) -> str:
+    """
+    Artifact with the ChurnPredictor layer shapes and random weights.
+    """
+    rng = np.random.default_rng(seed)
+    params = {
+        f"Dense_{i}": {
+            'kernel': rng.normal(0, 1 / np.sqrt(n_in), (n_in, n_out)).astype(np.float32),
+            'bias': np.zeros(n_out, dtype=np.float32),
+        }
+        for i, (n_in, n_out) in enumerate(zip(LAYER_SIZES[:-1], LAYER_SIZES[1:]))
+    }
+    header = {'version': 'bench', 'metrics': {}, 'feature_order': FEATURE_COLUMNS, 'norm_params': norm_params,
+              'activations': {'hidden': 'relu', 'output': 'linear'}}
+    return save_artifact(str(path / "model_bench.mdl"), {'params': params}, header)
+
+
+async def run_load(predict, concurrency: int, duration: float, seed: int) -> Dict:
+    rng = np.random.default_rng(seed)
+    features = rng.random((1024, len(FEATURE_COLUMNS)), dtype=np.float32)
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await predict(features[i % len(features)])
+            latencies.append(time.perf_counter() - start)
+            i += concurrency
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def benchmark(args, engine: MLEngine) -> List[Dict]:
+    loop = asyncio.get_running_loop()
+    # The threadpool stands in for FastAPI's: one single-row forward pass per request.
+    unbatched_pool = ThreadPoolExecutor(max_workers=40)
+
+    async def predict_unbatched(row):
+        return await loop.run_in_executor(unbatched_pool, engine.predict_proba, row)
+
+    batcher = MicroBatcher(
+        engine_getter=lambda: engine,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms
+    )
+
+    for row in [np.zeros((size, len(FEATURE_COLUMNS)), dtype=np.float32) for size in engine.buckets]:
+        engine.predict_proba(row)
+
+    rows = []
+    print(f"{'mode':>10} {'clients':>8} {'req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'rows/batch':>11}")
+    for concurrency in args.concurrency:
+        for mode, predict in [('unbatched', predict_unbatched), ('batched', batcher.predict)]:
+            batcher.stats = {'requests': 0, 'rows': 0, 'batches': 0}
+            result = await run_load(predict, concurrency, args.duration, args.seed)
+            result.update(mode=mode, concurrency=concurrency)
+            if mode == 'batched':
+                result['mean_batch_rows'] = batcher.stats['rows'] / max(batcher.stats['batches'], 1)
+            rows.append(result)
+
+            batch_col = f"{result['mean_batch_rows']:.1f}" if 'mean_batch_rows' in result else '-'
+            print(f"{mode:>10} {concurrency:>8} {result['throughput_rps']:>10,.0f} "
+                  f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {batch_col:>11}")
+
+    batcher.close()
+    unbatched_pool.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64, 256])
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of load per scenario')
+    parser.add_argument('--max-batch-size', type=int, default=512)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--buckets', type=int, nargs='+', default=[1, 8, 32, 128, 512])
+    parser.add_argument('--model', default=None, help='Model artifact to serve (random weights by default)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or write_random_model(Path(tmp), args.seed)
+        engine = MLEngine(model_path, buckets=args.buckets)
+        rows = asyncio.run(benchmark(args, engine))
+
+    write_results('inference_batching', rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
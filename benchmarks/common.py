@@ -0,0 +1,58 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.append(str(ROOT / 'ml_pipeline'))
+sys.path.append(str(ROOT / 'backend'))
+
+
+@contextmanager
+def timer(results: Dict, name: str) -> Iterator[None]:
+    """
+    Record the wall time of the enclosed block in ``results[name]`` (seconds).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[name] = time.perf_counter() - start
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def write_results(name: str, rows: List[Dict], output: str = None, metadata: Dict = None) -> str:
+    """Write benchmark rows and environment metadata as JSON."""
+    payload = {
+        'benchmark': name,
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        **(metadata or {}),
+        'results': rows,
+    }
+    if output is None:
+        output = str(ROOT / 'benchmarks' / 'results' / f"{name}.json")
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"Results written to {output}")
+    return output
@@ -0,0 +1,151 @@
+"""Compare two sets of benchmark results; exits 1 on a regression beyond --threshold."""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HIGHER_IS_BETTER = ('_per_s', '_per_sec', '_rps', 'speedup')
+LOWER_IS_BETTER = ('_ms', '_s', '_seconds')
+# Load tests run for a fixed duration and pipeline stages report
+# items_per_s alongside, so wall time alone carries no signal.
+IGNORED_METRICS = {'elapsed_s'}
+IGNORED_BENCHMARKS = {'suite'}
+# Outcome counts: any increase in these is a regression.
+ERROR_FIELDS = ('errors', 'failures', 'flush_errors', 'undrained_events')
+COUNT_FIELDS = {'requests', 'events', 'items', 'connects', 'flushes', *ERROR_FIELDS}
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    path = Path(path)
+    files = sorted(path.glob('*.json')) if path.is_dir() else [path]
+    results = {}
+    for file in files:
+        with open(file) as f:
+            payload = json.load(f)
+        if payload.get('benchmark') not in IGNORED_BENCHMARKS:
+            results[payload['benchmark']] = payload
+    return results
+
+
+def metric_direction(field: str) -> Optional[int]:
+    """
+    +1 if higher is better, -1 if lower is better, None if not a metric.
+    """
+    if field in IGNORED_METRICS:
+        return None
+    if field.endswith(HIGHER_IS_BETTER):
+        return 1
+    if field.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def labels(row: Dict) -> Tuple:
+    """
+    The settings that identify a row, as sorted (field, value) pairs.
+    """
+    return tuple(sorted(
+        (k, v) for k, v in row.items()
+        if isinstance(v, (str, bool, int)) and k not in COUNT_FIELDS and metric_direction(k) is None
+    ))
+
+
+def row_label(row: Dict) -> str:
+    return ' '.join(f"{k}={v}" for k, v in labels(row))
+
+
+def index_rows(rows: List[Dict]) -> Dict[Tuple, Dict]:
+    """
+    Rows keyed by their labels; repeated labels are told apart by order.
+    """
+    indexed, seen = {}, {}
+    for row in rows:
+        key = labels(row)
+        seen[key] = seen.get(key, 0) + 1
+        indexed[key if seen[key] == 1 else key + (('#', seen[key]),)] = row
+    return indexed
+
+
+def compare_rows(benchmark: str, base: Dict, new: Dict, threshold: float) -> List[Dict]:
+    label = row_label(base)
+    changes = []
+    for field, base_value in base.items():
+        new_value = new.get(field)
+        if not isinstance(base_value, (int, float)) or not isinstance(new_value, (int, float)):
+            continue
+        if field in ERROR_FIELDS:
+            if new_value > base_value:
+                changes.append({
+                    'benchmark': benchmark, 'label': label, 'metric': field,
+                    'base': base_value, 'new': new_value,
+                    'change': (new_value - base_value) / base_value if base_value else float('inf'),
+                    'regression': True, 'improvement': False,
+                })
+            continue
+        direction = metric_direction(field)
+        if direction is None:
+            continue
+        change = (new_value - base_value) / base_value if base_value else 0.0
+        changes.append({
+            'benchmark': benchmark,
+            'label': label,
+            'metric': field,
+            'base': base_value,
+            'new': new_value,
+            'change': change,
+            'regression': change * direction < -threshold,
+            'improvement': change * direction > threshold,
+        })
+    return changes
+
+
+def compare(base: Dict[str, Dict], new: Dict[str, Dict], threshold: float) -> List[Dict]:
+    changes = []
+    for benchmark in sorted(base.keys() & new.keys()):
+        base_rows, new_rows = index_rows(base[benchmark]['results']), index_rows(new[benchmark]['results'])
+        for key, base_row in base_rows.items():
+            if key in new_rows:
+                changes.extend(compare_rows(benchmark, base_row, new_rows[key], threshold))
+        for side, rows, other in (('base', base_rows, new_rows), ('new', new_rows, base_rows)):
+            for key in rows.keys() - other.keys():
+                print(f"{benchmark}: row only in {side}: {row_label(rows[key])}")
+    for benchmark in sorted(base.keys() ^ new.keys()):
+        print(f"{benchmark}: only in {'base' if benchmark in base else 'new'}")
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base', help='Baseline results file or directory')
+    parser.add_argument('new', help='Results file or directory to check')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change counted as a regression')
+    parser.add_argument('--all', action='store_true', help='Print unchanged metrics too')
+    parser.add_argument('--output', default=None, help='Also write the comparison as JSON')
+    args = parser.parse_args()
+
+    base, new = load_results(args.base), load_results(args.new)
+    changes = compare(base, new, args.threshold)
+
+    print(f"\n{'benchmark':<20} {'row':<40} {'metric':<22} {'base':>12} {'new':>12} {'change':>8}")
+    for change in changes:
+        if not (args.all or change['regression'] or change['improvement']):
+            continue
+        flag = ' REGRESSION' if change['regression'] else ''
+        print(f"{change['benchmark']:<20} {change['label'][:40]:<40} {change['metric']:<22} "
+              f"{change['base']:>12.4g} {change['new']:>12.4g} {change['change']:>+8.1%}{flag}")
+
+    regressions = [change for change in changes if change['regression']]
+    commits = (next(iter(base.values()), {}).get('commit'), next(iter(new.values()), {}).get('commit'))
+    print(f"\n{len(changes)} metrics compared ({commits[0]} -> {commits[1]}), "
+          f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'base': args.base, 'new': args.new, 'threshold': args.threshold, 'changes': changes}, f, indent=2)
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
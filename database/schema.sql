@@ -12,14 +12,124 @@ CREATE TABLE IF NOT EXISTS users (
 );
 
 
+-- An existing unpartitioned events table is renamed here and its rows are
+-- copied into the partitioned table below.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'events' AND relkind = 'r') THEN
+        ALTER TABLE events RENAME TO events_unpartitioned;
+        ALTER SEQUENCE events_event_id_seq RENAME TO events_unpartitioned_event_id_seq;
+    END IF;
+END $$;
+
+
+-- Monthly range partitions on timestamp; rows outside every partition land
+-- in events_default until ensure_events_partition() moves them.
 CREATE TABLE IF NOT EXISTS events (
-    event_id SERIAL PRIMARY KEY,
+    event_id SERIAL,
     user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
     event_type VARCHAR(100) NOT NULL,
     event_data JSONB,
     session_duration FLOAT,
-    timestamp TIMESTAMP DEFAULT NOW()
-);
+    timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (event_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS events_default PARTITION OF events DEFAULT;
+
+
+CREATE OR REPLACE FUNCTION ensure_events_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date;
+    end_date DATE := (date_trunc('month', month) + INTERVAL '1 month')::date;
+    partition_name TEXT := 'events_' || to_char(month, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    -- Build the partition detached, move any rows for this month out of the
+    -- default partition, then attach. Moved rows are already in the rollups.
+    EXECUTE format('CREATE TABLE %I (LIKE events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I CHECK (timestamp >= %L AND timestamp < %L)',
+        partition_name, partition_name || '_bounds', start_date, end_date
+    );
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM events_default WHERE timestamp >= %L AND timestamp < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_date, end_date, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', partition_name, partition_name || '_bounds');
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION create_events_partitions(from_month DATE, to_month DATE) RETURNS SETOF TEXT AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month)::date;
+BEGIN
+    WHILE month <= to_month LOOP
+        RETURN NEXT ensure_events_partition(month);
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Retention: drop whole monthly partitions that end on or before cutoff.
+-- user_rollup keeps lifetime totals, so dropped events stay counted there.
+CREATE OR REPLACE FUNCTION drop_events_partitions_before(cutoff DATE) RETURNS SETOF TEXT AS $$
+DECLARE
+    partition RECORD;
+BEGIN
+    FOR partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'events'::regclass
+          AND c.relname ~ '^events_[0-9]{4}_[0-9]{2}$'
+        ORDER BY c.relname
+    LOOP
+        IF (to_date(substr(partition.relname, 8), 'YYYY_MM') + INTERVAL '1 month')::date <= cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition.relname);
+            RETURN NEXT partition.relname;
+        END IF;
+    END LOOP;
+    DELETE FROM events_default WHERE timestamp < cutoff;
+END;
+$$ LANGUAGE plpgsql;
+
+
+SELECT create_events_partitions((NOW() - INTERVAL '24 months')::date, (NOW() + INTERVAL '3 months')::date);
+
+
+DO $$
+DECLARE
+    bounds RECORD;
+BEGIN
+    IF to_regclass('events_unpartitioned') IS NULL THEN
+        RETURN;
+    END IF;
+
+    SELECT MIN(timestamp) AS first_event, MAX(timestamp) AS last_event INTO bounds FROM events_unpartitioned;
+    IF bounds.first_event IS NOT NULL THEN
+        PERFORM create_events_partitions(bounds.first_event::date, bounds.last_event::date);
+    END IF;
+
+    INSERT INTO events (event_id, user_id, event_type, event_data, session_duration, timestamp)
+    SELECT event_id, user_id, event_type, event_data, session_duration, COALESCE(timestamp, NOW())
+    FROM events_unpartitioned;
+    PERFORM setval('events_event_id_seq', GREATEST((SELECT MAX(event_id) FROM events), 1));
+
+    -- CASCADE drops the old user_analytics view, which is recreated below.
+    DROP TABLE events_unpartitioned CASCADE;
+END $$;
 
 
 CREATE TABLE IF NOT EXISTS predictions (
@@ -48,7 +158,7 @@ CREATE TABLE IF NOT EXISTS model_metadata (
 );
 
 
-CREATE INDEX IF NOT EXISTS idx_events_user_id ON events(user_id);
+CREATE INDEX IF NOT EXISTS idx_events_user_timestamp ON events(user_id, timestamp);
 CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
 CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type);
 CREATE INDEX IF NOT EXISTS idx_predictions_user_id ON predictions(user_id);
@@ -57,25 +167,288 @@ CREATE INDEX IF NOT EXISTS idx_users_last_active ON users(last_active);
 CREATE INDEX IF NOT EXISTS idx_users_churned ON users(churned);
 
 
-CREATE OR REPLACE VIEW user_analytics AS
+CREATE INDEX IF NOT EXISTS idx_predictions_user_created ON predictions(user_id, created_at DESC);
+
+
+-- Per-user event rollup, maintained by the statement-level trigger below so
+-- analytics never aggregate the events table at read time.
+CREATE TABLE IF NOT EXISTS user_rollup (
+    user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    total_events BIGINT NOT NULL DEFAULT 0,
+    session_duration_sum FLOAT NOT NULL DEFAULT 0,
+    session_duration_count BIGINT NOT NULL DEFAULT 0,
+    active_days BIGINT NOT NULL DEFAULT 0,
+    first_event_time TIMESTAMP,
+    last_event_time TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_active_days (
+    user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+
+CREATE OR REPLACE FUNCTION apply_events_to_user_rollup() RETURNS TRIGGER AS $$
+BEGIN
+    WITH new_days AS (
+        INSERT INTO user_active_days (user_id, day)
+        SELECT DISTINCT user_id, timestamp::date
+        FROM new_events
+        WHERE user_id IS NOT NULL AND timestamp IS NOT NULL
+        ON CONFLICT DO NOTHING
+        RETURNING user_id
+    ),
+    day_counts AS (
+        SELECT user_id, COUNT(*) AS active_days
+        FROM new_days
+        GROUP BY user_id
+    ),
+    event_counts AS (
+        SELECT
+            user_id,
+            COUNT(*) AS total_events,
+            COALESCE(SUM(session_duration), 0) AS session_duration_sum,
+            COUNT(session_duration) AS session_duration_count,
+            MIN(timestamp) AS first_event_time,
+            MAX(timestamp) AS last_event_time
+        FROM new_events
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+    )
+    INSERT INTO user_rollup AS r (
+        user_id, total_events, session_duration_sum, session_duration_count,
+        active_days, first_event_time, last_event_time
+    )
+    SELECT
+        e.user_id, e.total_events, e.session_duration_sum, e.session_duration_count,
+        COALESCE(d.active_days, 0), e.first_event_time, e.last_event_time
+    FROM event_counts e
+    LEFT JOIN day_counts d ON d.user_id = e.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_events = r.total_events + EXCLUDED.total_events,
+        session_duration_sum = r.session_duration_sum + EXCLUDED.session_duration_sum,
+        session_duration_count = r.session_duration_count + EXCLUDED.session_duration_count,
+        active_days = r.active_days + EXCLUDED.active_days,
+        first_event_time = LEAST(r.first_event_time, EXCLUDED.first_event_time),
+        last_event_time = GREATEST(r.last_event_time, EXCLUDED.last_event_time);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS events_user_rollup ON events;
+CREATE TRIGGER events_user_rollup
+    AFTER INSERT ON events
+    REFERENCING NEW TABLE AS new_events
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_events_to_user_rollup();
+
+
+-- Recompute both rollup tables from events (initial backfill or repair).
+CREATE OR REPLACE FUNCTION rebuild_user_rollup() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE user_rollup, user_active_days;
+
+    INSERT INTO user_active_days (user_id, day)
+    SELECT DISTINCT user_id, timestamp::date
+    FROM events
+    WHERE user_id IS NOT NULL AND timestamp IS NOT NULL;
+
+    INSERT INTO user_rollup (
+        user_id, total_events, session_duration_sum, session_duration_count,
+        active_days, first_event_time, last_event_time
+    )
+    SELECT
+        e.user_id,
+        COUNT(*),
+        COALESCE(SUM(e.session_duration), 0),
+        COUNT(e.session_duration),
+        (SELECT COUNT(*) FROM user_active_days d WHERE d.user_id = e.user_id),
+        MIN(e.timestamp),
+        MAX(e.timestamp)
+    FROM events e
+    WHERE e.user_id IS NOT NULL
+    GROUP BY e.user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill only when the rollup was just created; once populated the
+-- trigger keeps it current, so re-applying this file skips the scan.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM user_rollup) AND EXISTS (SELECT 1 FROM events) THEN
+        PERFORM rebuild_user_rollup();
+    END IF;
+END;
+$$;
+
+
+-- Dashboard counters. Each counter is spread over 16 shards (picked by
+-- backend pid) so concurrent writers rarely touch the same row; readers sum
+-- at most 16 rows per counter.
+CREATE TABLE IF NOT EXISTS analytics_counters (
+    name VARCHAR(50) NOT NULL,
+    shard SMALLINT NOT NULL,
+    value DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, shard)
+);
+
+CREATE TABLE IF NOT EXISTS prediction_hourly (
+    hour TIMESTAMP PRIMARY KEY,
+    prediction_count BIGINT NOT NULL DEFAULT 0,
+    predicted_value_sum DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+
+
+CREATE OR REPLACE FUNCTION bump_counter(counter_name TEXT, delta DOUBLE PRECISION) RETURNS VOID AS $$
+BEGIN
+    IF delta <> 0 THEN
+        INSERT INTO analytics_counters AS c (name, shard, value)
+        VALUES (counter_name, pg_backend_pid() % 16, delta)
+        ON CONFLICT (name, shard) DO UPDATE SET value = c.value + EXCLUDED.value;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION count_users() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counter('users_total', (SELECT COUNT(*) FROM new_rows));
+        PERFORM bump_counter('users_churned', (SELECT COUNT(*) FROM new_rows WHERE churned));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_counter('users_total', -(SELECT COUNT(*) FROM old_rows));
+        PERFORM bump_counter('users_churned', -(SELECT COUNT(*) FROM old_rows WHERE churned));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM bump_counter(
+            'users_churned',
+            (SELECT COUNT(*) FROM new_rows WHERE churned) - (SELECT COUNT(*) FROM old_rows WHERE churned)
+        );
+    ELSIF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM analytics_counters WHERE name LIKE 'users\_%';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_count_insert ON users;
+CREATE TRIGGER users_count_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_users();
+DROP TRIGGER IF EXISTS users_count_update ON users;
+CREATE TRIGGER users_count_update AFTER UPDATE ON users
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_users();
+DROP TRIGGER IF EXISTS users_count_delete ON users;
+CREATE TRIGGER users_count_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_users();
+DROP TRIGGER IF EXISTS users_count_truncate ON users;
+CREATE TRIGGER users_count_truncate AFTER TRUNCATE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION count_users();
+
+
+CREATE OR REPLACE FUNCTION count_predictions() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counter('predictions_total', (SELECT COUNT(*) FROM new_rows));
+        PERFORM bump_counter('predictions_value_sum', (SELECT COALESCE(SUM(predicted_value), 0) FROM new_rows));
+
+        INSERT INTO prediction_hourly AS h (hour, prediction_count, predicted_value_sum)
+        SELECT date_trunc('hour', created_at), COUNT(*), SUM(predicted_value)
+        FROM new_rows
+        WHERE created_at IS NOT NULL
+        GROUP BY 1
+        ON CONFLICT (hour) DO UPDATE SET
+            prediction_count = h.prediction_count + EXCLUDED.prediction_count,
+            predicted_value_sum = h.predicted_value_sum + EXCLUDED.predicted_value_sum;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_counter('predictions_total', -(SELECT COUNT(*) FROM old_rows));
+        PERFORM bump_counter('predictions_value_sum', -(SELECT COALESCE(SUM(predicted_value), 0) FROM old_rows));
+
+        UPDATE prediction_hourly h SET
+            prediction_count = h.prediction_count - d.prediction_count,
+            predicted_value_sum = h.predicted_value_sum - d.predicted_value_sum
+        FROM (
+            SELECT date_trunc('hour', created_at) AS hour, COUNT(*) AS prediction_count,
+                   SUM(predicted_value) AS predicted_value_sum
+            FROM old_rows
+            WHERE created_at IS NOT NULL
+            GROUP BY 1
+        ) d
+        WHERE h.hour = d.hour;
+    ELSIF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM analytics_counters WHERE name LIKE 'predictions\_%';
+        DELETE FROM prediction_hourly;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS predictions_count_insert ON predictions;
+CREATE TRIGGER predictions_count_insert AFTER INSERT ON predictions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_predictions();
+DROP TRIGGER IF EXISTS predictions_count_delete ON predictions;
+CREATE TRIGGER predictions_count_delete AFTER DELETE ON predictions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_predictions();
+DROP TRIGGER IF EXISTS predictions_count_truncate ON predictions;
+CREATE TRIGGER predictions_count_truncate AFTER TRUNCATE ON predictions
+    FOR EACH STATEMENT EXECUTE FUNCTION count_predictions();
+
+
+CREATE OR REPLACE FUNCTION rebuild_analytics_rollups() RETURNS VOID AS $$
+BEGIN
+    DELETE FROM analytics_counters;
+    DELETE FROM prediction_hourly;
+
+    INSERT INTO analytics_counters (name, shard, value)
+    SELECT 'users_total', 0, COUNT(*) FROM users
+    UNION ALL SELECT 'users_churned', 0, COUNT(*) FROM users WHERE churned
+    UNION ALL SELECT 'predictions_total', 0, COUNT(*) FROM predictions
+    UNION ALL SELECT 'predictions_value_sum', 0, COALESCE(SUM(predicted_value), 0) FROM predictions;
+
+    INSERT INTO prediction_hourly (hour, prediction_count, predicted_value_sum)
+    SELECT date_trunc('hour', created_at), COUNT(*), SUM(predicted_value)
+    FROM predictions
+    WHERE created_at IS NOT NULL
+    GROUP BY 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Seed the counters only when they were just created; the triggers keep
+-- them current after that.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM analytics_counters) THEN
+        PERFORM rebuild_analytics_rollups();
+    END IF;
+END;
+$$;
+
+
+DROP VIEW IF EXISTS user_analytics;
+CREATE VIEW user_analytics AS
 SELECT 
     u.user_id,
     u.email,
     u.subscription_tier,
     u.churned,
     EXTRACT(DAY FROM (NOW() - u.last_active)) as days_since_last_active,
-    COUNT(DISTINCT e.event_id) as total_events,
-    COUNT(DISTINCT DATE(e.timestamp)) as active_days,
-    AVG(e.session_duration) as avg_session_duration,
-    MAX(e.timestamp) as last_event_time,
-    (SELECT predicted_value 
-     FROM predictions p 
-     WHERE p.user_id = u.user_id 
-     ORDER BY p.created_at DESC 
-     LIMIT 1) as latest_churn_prediction
+    COALESCE(r.total_events, 0) as total_events,
+    COALESCE(r.active_days, 0) as active_days,
+    r.session_duration_sum / NULLIF(r.session_duration_count, 0) as avg_session_duration,
+    r.last_event_time,
+    p.predicted_value as latest_churn_prediction
 FROM users u
-LEFT JOIN events e ON u.user_id = e.user_id
-GROUP BY u.user_id, u.email, u.subscription_tier, u.churned, u.last_active;
+LEFT JOIN user_rollup r ON r.user_id = u.user_id
+LEFT JOIN LATERAL (
+    SELECT predicted_value
+    FROM predictions
+    WHERE user_id = u.user_id
+    ORDER BY created_at DESC
+    LIMIT 1
+) p ON TRUE;
 
 
 INSERT INTO model_metadata (version, accuracy, deployed_at, storage_path, is_active)
@@ -3,6 +3,7 @@
    
 import psycopg2
 from psycopg2.extras import execute_values
+import json
 import random
 from datetime import datetime, timedelta
 from faker import Faker
@@ -141,7 +142,7 @@ def generate_events(users, conn):
             events.append((
                 user_id,
                 event_type,
-                str(event_data).replace("'", '"'),
+                json.dumps(event_data),
                 session_duration,
                 event_time
             ))
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { AnalyticsData, UserAnalytics, Prediction, PredictionTimeline } from '../types';
+import type { AnalyticsData, UserAnalytics, UserAnalyticsPage, Prediction, PredictionTimeline } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -17,13 +17,20 @@ export const api = {
         return response.data;
     },
 
-    getUserAnalytics: async (limit: number = 100): Promise<UserAnalytics[]> => {
-        const response = await apiClient.get('/api/analytics/users', {
-            params: { limit },
+    getUserAnalytics: async (limit: number = 100, after?: number | null): Promise<UserAnalyticsPage> => {
+        const response = await apiClient.get<UserAnalytics[]>('/api/analytics/users', {
+            params: after != null ? { limit, after } : { limit },
         });
-        return response.data;
+        const cursor = response.headers['x-next-cursor'];
+        return {
+            users: response.data,
+            nextCursor: cursor ? Number(cursor) : null,
+        };
     },
 
+    userAnalyticsExportUrl: (format: 'ndjson' | 'csv' = 'csv'): string =>
+        `${API_BASE_URL}/api/analytics/users/export?format=${format}`,
+
     getPredictionTimeline: async (days: number = 30): Promise<PredictionTimeline[]> => {
         const response = await apiClient.get('/api/analytics/predictions/timeline', {
             params: { days },
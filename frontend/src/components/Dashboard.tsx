@@ -1,31 +1,49 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { api } from '../api/client';
 import MetricsCard from './MetricsCard';
 import PredictionChart from './PredictionChart';
 import UserTable from './UserTable';
-import type { AnalyticsData, UserAnalytics, PredictionTimeline } from '../types';
+import type { AnalyticsData, UserAnalytics, UserAnalyticsPage, PredictionTimeline } from '../types';
+
+const USERS_PAGE_SIZE = 50;
+
+// Re-read the first `count` users page by page, so a refresh keeps the rows
+// brought in through "Load more".
+const fetchUserPages = async (count: number): Promise<UserAnalyticsPage> => {
+    let users: UserAnalytics[] = [];
+    let cursor: number | null = null;
+    do {
+        const page: UserAnalyticsPage = await api.getUserAnalytics(USERS_PAGE_SIZE, cursor);
+        users = users.concat(page.users);
+        cursor = page.nextCursor;
+    } while (cursor !== null && users.length < count);
+    return { users, nextCursor: cursor };
+};
 
 const Dashboard: React.FC = () => {
     const [analytics, setAnalytics] = useState<AnalyticsData | null>(null);
     const [users, setUsers] = useState<UserAnalytics[]>([]);
+    const [nextCursor, setNextCursor] = useState<number | null>(null);
     const [timeline, setTimeline] = useState<PredictionTimeline[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
     const [lastUpdate, setLastUpdate] = useState<Date>(new Date());
+    const loadedUsers = useRef(USERS_PAGE_SIZE);
 
     const fetchData = async () => {
         try {
             setError(null);
 
             
-            const [analyticsData, usersData, timelineData] = await Promise.all([
+            const [analyticsData, usersPage, timelineData] = await Promise.all([
                 api.getAnalytics(),
-                api.getUserAnalytics(50),
+                fetchUserPages(loadedUsers.current),
                 api.getPredictionTimeline(30),
             ]);
 
             setAnalytics(analyticsData);
-            setUsers(usersData);
+            setUsers(usersPage.users);
+            setNextCursor(usersPage.nextCursor);
             setTimeline(timelineData);
             setLastUpdate(new Date());
             setLoading(false);
@@ -36,6 +54,18 @@ const Dashboard: React.FC = () => {
         }
     };
 
+    const loadMoreUsers = async () => {
+        if (nextCursor === null) return;
+        try {
+            const page = await api.getUserAnalytics(USERS_PAGE_SIZE, nextCursor);
+            loadedUsers.current += page.users.length;
+            setUsers((current) => [...current, ...page.users]);
+            setNextCursor(page.nextCursor);
+        } catch (err) {
+            console.error('Error fetching users:', err);
+        }
+    };
+
     useEffect(() => {
         
         fetchData();
@@ -160,6 +190,24 @@ const Dashboard: React.FC = () => {
             {users.length > 0 && (
                 <UserTable users={users} />
             )}
+            {users.length > 0 && (
+                <div className="flex justify-end space-x-3">
+                    <a
+                        href={api.userAnalyticsExportUrl('csv')}
+                        className="btn-secondary"
+                    >
+                        Export CSV
+                    </a>
+                    {nextCursor !== null && (
+                        <button
+                            onClick={loadMoreUsers}
+                            className="btn-primary"
+                        >
+                            Load more
+                        </button>
+                    )}
+                </div>
+            )}
 
             {}
             <div className="card bg-primary-900/20 border-primary-800">
@@ -19,6 +19,11 @@ export interface UserAnalytics {
     latest_churn_prediction: number | null;
 }
 
+export interface UserAnalyticsPage {
+    users: UserAnalytics[];
+    nextCursor: number | null;
+}
+
 export interface Prediction {
     user_id: number;
     prediction: number;
@@ -2,10 +2,305 @@
 \
 \
    
+import base64
 import json
 import os
 import psycopg2
+import time
 from datetime import datetime
+from psycopg2.extras import execute_values
+from typing import Dict, List, Optional, Tuple
+
+REQUIRED_FIELDS = ('user_id', 'event_type')
+
+# Errors worth retrying: the connection or server, not the data.
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+# Errors one record's data can cause; that record is rejected on its own.
+RECORD_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+# Optional SQS queue for permanently rejected records; without it they are
+# only logged.
+DEAD_LETTER_QUEUE_URL = os.environ.get('DEAD_LETTER_QUEUE_URL')
+
+INSERT_EVENTS_SQL = """
+    INSERT INTO events (user_id, event_type, event_data, session_duration, timestamp)
+    VALUES %s
+    RETURNING event_id
+"""
+
+# One statement for the whole batch; GREATEST keeps out-of-order batches
+# from moving last_active backwards.
+UPDATE_LAST_ACTIVE_SQL = """
+    UPDATE users AS u
+    SET last_active = GREATEST(u.last_active, v.last_active)
+    FROM (VALUES %s) AS v(user_id, last_active)
+    WHERE u.user_id = v.user_id
+"""
+
+
+# Ping a reused connection only if it sat idle longer than this; warm
+# invocations in quick succession go straight to the write.
+VALIDATE_IDLE_SECONDS = float(os.environ.get('DB_VALIDATE_IDLE_SECONDS', 60))
+
+# Module state survives between warm invocations of one execution environment.
+_connection = None
+_last_used = 0.0
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+Record = Tuple[Optional[str], List[Dict]]
+Rejected = Tuple[Optional[str], str, object]
+
+
+def _connect():
+    """
+    Works through pgbouncer in transaction mode as well: psycopg2 sends no
+    named prepared statements and the handler keeps no session state.
+    """
+    return psycopg2.connect(
+        host=os.environ.get('DB_HOST'),
+        port=os.environ.get('DB_PORT', '5432'),
+        database=os.environ.get('DB_NAME'),
+        user=os.environ.get('DB_USER'),
+        password=os.environ.get('DB_PASSWORD'),
+        connect_timeout=int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        application_name='event_processor',
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=3
+    )
+
+
+def close_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except psycopg2.Error:
+            pass
+    _connection = None
+
+
+def get_connection():
+    """
+    The module-level connection, opened on first use (cold start) and
+    reopened if it has been closed or fails the idle ping.
+    """
+    global _connection
+    if _connection is not None and not _connection.closed and time.monotonic() - _last_used > VALIDATE_IDLE_SECONDS:
+        try:
+            with _connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            _connection.rollback()
+        except psycopg2.Error:
+            close_connection()
+    if _connection is None or _connection.closed:
+        _connection = _connect()
+    return _connection
+
+
+def _parse_timestamp(value, default: datetime) -> datetime:
+    """
+    Client-supplied ISO timestamp as a naive local time, like ``datetime.now()``.
+    """
+    if not value:
+        return default
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+
+def _record_id(record) -> Optional[str]:
+    """
+    Item identifier of an SQS or Kinesis record, for partial batch responses.
+    """
+    if not isinstance(record, dict):
+        return None
+    if 'kinesis' in record:
+        return record['kinesis'].get('sequenceNumber')
+    return record.get('messageId')
+
+
+def _decode_record(record: Dict) -> object:
+    """
+    Decoded payload of one SQS or Kinesis record.
+    """
+    if 'kinesis' in record:
+        return json.loads(base64.b64decode(record['kinesis']['data']))
+    if 'body' in record:
+        return json.loads(record['body'])
+    return record
+
+
+def extract_events(event) -> Tuple[List[Record], List[Rejected], bool]:
+    """
+    Normalize an invocation payload into records ``[(item identifier,
+    [event, ...]), ...]``.
+
+    Accepts an SQS or Kinesis ``Records`` batch, a list of events or a
+    single event (optionally as a JSON string); a record body may itself
+    hold a list of events. Returns the records, the records rejected as
+    malformed ``(item identifier, reason, payload)``, and whether the
+    payload was a record batch. Outside a record batch every event is its
+    own record.
+    """
+    if isinstance(event, str):
+        event = json.loads(event)
+
+    is_batch = isinstance(event, dict) and 'Records' in event
+    if is_batch:
+        items = event['Records']
+    elif isinstance(event, list):
+        items = event
+    else:
+        items = [event]
+
+    records, rejected = [], []
+    for item in items:
+        item_id, payload = (_record_id(item) if is_batch else None), item
+        try:
+            payload = _decode_record(item) if is_batch else item
+            record_events = payload if isinstance(payload, list) else [payload]
+            for event_data in record_events:
+                if not isinstance(event_data, dict) or any(event_data.get(f) is None for f in REQUIRED_FIELDS):
+                    raise InvalidRecord(f"missing one of {REQUIRED_FIELDS}")
+                int(event_data['user_id'])
+                _parse_timestamp(event_data.get('timestamp'), None)
+            records.append((item_id, record_events))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            rejected.append((item_id, f"malformed: {e}", payload))
+    return records, rejected, is_batch
+
+
+def write_events(conn, events: List[Dict], received_at: datetime) -> List[int]:
+    """
+    Insert ``events`` with one multi-row INSERT and bump ``last_active``
+    once per user; returns event IDs in input order. Does not commit.
+    """
+    rows = []
+    last_active: Dict[int, datetime] = {}
+    for event_data in events:
+        user_id = int(event_data['user_id'])
+        timestamp = _parse_timestamp(event_data.get('timestamp'), received_at)
+        rows.append((
+            user_id,
+            event_data['event_type'],
+            json.dumps(event_data.get('event_data', {})),
+            event_data.get('session_duration'),
+            timestamp
+        ))
+        last_active[user_id] = max(timestamp, last_active.get(user_id, timestamp))
+
+    with conn.cursor() as cursor:
+        event_ids = execute_values(cursor, INSERT_EVENTS_SQL, rows, page_size=len(rows), fetch=True)
+        execute_values(
+            cursor, UPDATE_LAST_ACTIVE_SQL, sorted(last_active.items()),
+            template="(%s::integer, %s::timestamp)", page_size=len(last_active)
+        )
+    return [row[0] for row in event_ids]
+
+
+def known_user_ids(conn, user_ids) -> set:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT user_id FROM users WHERE user_id = ANY(%s)", (list(user_ids),))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _write_records_separately(conn, records: List[Record], received_at: datetime) -> Tuple[List[int], List[Rejected]]:
+    """
+    Write each record under its own savepoint, so one record whose data
+    the database refuses does not take the others down with it.
+    """
+    event_ids, rejected = [], []
+    with conn.cursor() as cursor:
+        for item_id, record_events in records:
+            cursor.execute("SAVEPOINT record")
+            try:
+                event_ids += write_events(conn, record_events, received_at)
+                cursor.execute("RELEASE SAVEPOINT record")
+            except RECORD_ERRORS as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT record")
+                rejected.append((item_id, f"refused by database: {str(e).strip()}", record_events))
+    return event_ids, rejected
+
+
+def process_events(records: List[Record]) -> Tuple[List[int], List[Rejected]]:
+    """
+    Write ``records`` in one transaction on the shared connection; returns
+    (event IDs, rejected records). Each record is written or rejected as a
+    whole: a record with an event for an unknown user, or with data the
+    database refuses, is rejected and none of its events are written.
+
+    A dropped connection (server restart, pgbouncer or NAT idle timeout)
+    is replaced and the batch retried once; a second failure is raised as
+    transient. If the drop hit the COMMIT itself the batch may be written
+    twice, which at-least-once sources already imply.
+    """
+    global _last_used
+    for attempt in range(2):
+        conn = get_connection()
+        try:
+            # Unknown users would fail the whole insert on the foreign key.
+            known = known_user_ids(conn, {int(e['user_id']) for _, record_events in records for e in record_events})
+            accepted, rejected = [], []
+            for item_id, record_events in records:
+                unknown = sorted({int(e['user_id']) for e in record_events} - known)
+                if unknown:
+                    rejected.append((item_id, f"unknown users {unknown}", record_events))
+                else:
+                    accepted.append((item_id, record_events))
+
+            received_at = datetime.now()
+            try:
+                event_ids = write_events(conn, [e for _, record_events in accepted for e in record_events],
+                                         received_at) if accepted else []
+            except RECORD_ERRORS:
+                conn.rollback()
+                event_ids, refused = _write_records_separately(conn, accepted, received_at)
+                rejected += refused
+            conn.commit()
+            _last_used = time.monotonic()
+            return event_ids, rejected
+        except TRANSIENT_ERRORS as e:
+            close_connection()
+            if attempt:
+                raise
+            print(f"Database connection lost ({e}); reconnecting")
+        except Exception:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close_connection()
+            raise
+
+
+def dead_letter(rejected: List[Rejected]):
+    """
+    Log permanently rejected records and, with DEAD_LETTER_QUEUE_URL set,
+    send them there. Retrying them would only fail again.
+    """
+    if not rejected:
+        return
+    messages = []
+    for item_id, reason, payload in rejected:
+        message = json.dumps({'item_id': item_id, 'reason': reason, 'payload': payload}, default=str)
+        print(f"Rejected record: {message}")
+        messages.append(message)
+
+    if DEAD_LETTER_QUEUE_URL:
+        import boto3
+
+        sqs = boto3.client('sqs')
+        for start in range(0, len(messages), 10):
+            sqs.send_message_batch(
+                QueueUrl=DEAD_LETTER_QUEUE_URL,
+                Entries=[{'Id': str(i), 'MessageBody': body} for i, body in enumerate(messages[start:start + 10])]
+            )
 
 
 def lambda_handler(event, context):
@@ -21,61 +316,50 @@ def lambda_handler(event, context):
 \
        
     
-                                              
-    db_host = os.environ.get('DB_HOST')
-    db_name = os.environ.get('DB_NAME')
-    db_user = os.environ.get('DB_USER')
-    db_password = os.environ.get('DB_PASSWORD')
+    is_batch = False
     
     try:
-                             
-        conn = psycopg2.connect(
-            host=db_host,
-            database=db_name,
-            user=db_user,
-            password=db_password
-        )
-        cursor = conn.cursor()
+        records, rejected, is_batch = extract_events(event)
+        event_ids: List[int] = []
+        transient: List[Optional[str]] = []
         
-                     
-        if isinstance(event, str):
-            event_data = json.loads(event)
-        else:
-            event_data = event
+        if records:
+            try:
+                event_ids, refused = process_events(records)
+                rejected += refused
+            except TRANSIENT_ERRORS as e:
+                if not is_batch:
+                    raise
+                print(f"Database unavailable, returning {len(records)} records for retry: {e}")
+                transient = [item_id for item_id, _ in records]
+        dead_letter(rejected)
         
-                      
-        cursor.execute("""
-            INSERT INTO events (user_id, event_type, event_data, session_duration, timestamp)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            event_data['user_id'],
-            event_data['event_type'],
-            json.dumps(event_data.get('event_data', {})),
-            event_data.get('session_duration'),
-            datetime.now()
-        ))
-        
-                                   
-        cursor.execute("""
-            UPDATE users
-            SET last_active = %s
-            WHERE user_id = %s
-        """, (datetime.now(), event_data['user_id']))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'message': 'Event processed successfully',
-                'event_id': cursor.lastrowid
-            })
+        body = {
+            'message': f"Processed {len(event_ids)} events",
+            'processed': len(event_ids),
+            'rejected': len(rejected),
+            'failed': len(rejected) + len(transient),
+            'event_ids': event_ids
+        }
+        if not is_batch and len(event_ids) == 1:
+            body['event_id'] = event_ids[0]
+        response = {
+            'statusCode': 200 if event_ids or not rejected else 400,
+            'body': json.dumps(body)
         }
+        if is_batch:
+            # Partial batch response: only records that failed for a
+            # transient reason are retried; rejected ones were dead-lettered.
+            response['batchItemFailures'] = [
+                {'itemIdentifier': item_id} for item_id in dict.fromkeys(transient) if item_id is not None
+            ]
+        return response
     
     except Exception as e:
         print(f"Error processing event: {e}")
+        if is_batch:
+            # Let the event source mapping retry the whole batch.
+            raise
         return {
             'statusCode': 500,
             'body': json.dumps({
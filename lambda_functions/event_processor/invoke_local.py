@@ -0,0 +1,128 @@
+"""
+Invoke the event processor locally with synthetic SQS, Kinesis, list and
+single-event payloads and check what reached the database.
+
+Point DB_HOST/DB_NAME/DB_USER/DB_PASSWORD at a throwaway Postgres loaded
+with database/schema.sql and at least a few users; the events written are
+left in place.
+
+    DB_HOST=localhost DB_NAME=scratch DB_USER=postgres DB_PASSWORD=postgres \
+        python invoke_local.py --batches 20 --batch-size 100
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import psycopg2
+
+from handler import lambda_handler
+
+EVENT_TYPES = ['login', 'page_view', 'feature_usage', 'purchase', 'logout']
+
+
+def synthetic_event(rng: random.Random, user_ids, now: datetime) -> dict:
+    return {
+        'user_id': rng.choice(user_ids),
+        'event_type': rng.choice(EVENT_TYPES),
+        'event_data': {'source': 'invoke_local'},
+        'session_duration': round(rng.uniform(0, 60), 2),
+        'timestamp': (now - timedelta(seconds=rng.uniform(0, 3600))).isoformat(),
+    }
+
+
+def sqs_batch(events) -> dict:
+    return {'Records': [
+        {'messageId': str(uuid.uuid4()), 'eventSource': 'aws:sqs', 'body': json.dumps(e)}
+        for e in events
+    ]}
+
+
+def kinesis_batch(events) -> dict:
+    return {'Records': [
+        {
+            'eventSource': 'aws:kinesis',
+            'kinesis': {
+                'sequenceNumber': str(i),
+                'data': base64.b64encode(json.dumps(e).encode()).decode(),
+            },
+        }
+        for i, e in enumerate(events)
+    ]}
+
+
+def connect():
+    return psycopg2.connect(
+        host=os.environ.get('DB_HOST'),
+        database=os.environ.get('DB_NAME'),
+        user=os.environ.get('DB_USER'),
+        password=os.environ.get('DB_PASSWORD')
+    )
+
+
+def count_events(conn) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM events")
+        count = cursor.fetchone()[0]
+    conn.rollback()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invoke the event processor with synthetic batches")
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--format', choices=['sqs', 'kinesis', 'list', 'single'], default='sqs')
+    parser.add_argument('--invalid', type=int, default=1, help='Malformed records added to each batch')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT user_id FROM users ORDER BY user_id LIMIT 10000")
+        user_ids = [row[0] for row in cursor.fetchall()]
+    if not user_ids:
+        raise SystemExit("No users in the target database; run database/seed_data.py first")
+    before = count_events(conn)
+
+    now = datetime.now()
+    processed = failed = 0
+    elapsed = 0.0
+    for _ in range(args.batches):
+        events = [synthetic_event(rng, user_ids, now) for _ in range(args.batch_size)]
+        if args.format == 'single':
+            payloads = events
+        else:
+            malformed = [{'event_type': 'login'}] * args.invalid
+            batch = events + malformed
+            payloads = [{'sqs': sqs_batch, 'kinesis': kinesis_batch, 'list': lambda e: e}[args.format](batch)]
+
+        for payload in payloads:
+            start = time.perf_counter()
+            response = lambda_handler(payload, None)
+            elapsed += time.perf_counter() - start
+            body = json.loads(response['body'])
+            processed += body.get('processed', 0)
+            failed += body.get('failed', 0)
+            if response['statusCode'] == 500:
+                raise SystemExit(f"Handler failed: {body}")
+            if args.format in ('sqs', 'kinesis') and response['batchItemFailures']:
+                raise SystemExit(f"Malformed records must not be retried, got {response['batchItemFailures']}")
+            if args.format != 'single' and body.get('rejected') != args.invalid:
+                raise SystemExit(f"Expected {args.invalid} rejected records, got {body.get('rejected')}")
+
+    written = count_events(conn) - before
+    conn.close()
+    print(f"{args.format}: {processed:,} events processed, {failed:,} rejected, {written:,} rows written "
+          f"in {elapsed:.2f}s ({processed / elapsed:,.0f} events/s)")
+    if written != processed:
+        raise SystemExit(f"Row count mismatch: {written} written, {processed} processed")
+
+
+if __name__ == "__main__":
+    main()
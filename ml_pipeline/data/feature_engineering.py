@@ -0,0 +1,356 @@
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from typing import Dict, List, Optional, Tuple
+
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+NAT_NS = np.iinfo(np.int64).min
+DAY_BITS = 20
+DAY_MASK = (1 << DAY_BITS) - 1
+
+SUBSCRIPTION_TIERS = ['free', 'basic', 'premium', 'enterprise']
+
+FEATURE_COLUMNS = [
+    'days_since_last_active',
+    'total_events',
+    'avg_session_duration',
+    'active_days',
+    'subscription_tier_encoded',
+    'event_type_diversity'
+]
+
+
+def to_epoch_ns(values) -> np.ndarray:
+    """Datetime-like values as int64 ns since the epoch (naive UTC, NaT as NAT_NS)."""
+    ts = pd.Series(values)
+    if not pd.api.types.is_datetime64_any_dtype(ts):
+        ts = pd.to_datetime(ts)
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert(None)
+    return ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def encode_categories(values: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """
+    Integer-encode a string column, reusing categorical codes when present.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=np.int64), list(values.cat.categories)
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), list(uniques)
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int64)
+    bits = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1)
+    return bits.sum(axis=1).astype(np.int64)
+
+
+def _run_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    flags = np.empty(len(sorted_keys), dtype=bool)
+    flags[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=flags[1:])
+    return np.flatnonzero(flags)
+
+
+def pack_user_days(user_idx: np.ndarray, timestamps_ns: np.ndarray) -> np.ndarray:
+    """Pack (user index, epoch day) pairs into int64 keys that sort by user, then day."""
+    return (user_idx.astype(np.int64) << DAY_BITS) | ((timestamps_ns // NS_PER_DAY) & DAY_MASK)
+
+
+def aggregate_events(
+    event_user_idx: np.ndarray,
+    n_users: int,
+    event_type_codes: np.ndarray,
+    session_durations: np.ndarray,
+    timestamps_ns: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Per-user event aggregates as dense arrays of length ``n_users``."""
+    out = {
+        'total_events': np.zeros(n_users, dtype=np.int64),
+        'duration_sum': np.zeros(n_users, dtype=np.float64),
+        'duration_count': np.zeros(n_users, dtype=np.int64),
+        'last_event_ns': np.full(n_users, NAT_NS, dtype=np.int64),
+        'active_days': np.zeros(n_users, dtype=np.int64),
+        'event_type_diversity': np.zeros(n_users, dtype=np.int64),
+    }
+    if len(event_user_idx) == 0:
+        return out
+
+    valid = ~np.isnan(session_durations)
+    out['total_events'] = np.bincount(event_user_idx, minlength=n_users)
+    if valid.all():
+        out['duration_sum'] = np.bincount(event_user_idx, weights=session_durations, minlength=n_users)
+        out['duration_count'] = out['total_events'].copy()
+    else:
+        out['duration_sum'] = np.bincount(
+            event_user_idx, weights=np.where(valid, session_durations, 0.0), minlength=n_users
+        )
+        out['duration_count'] = np.bincount(event_user_idx[valid], minlength=n_users)
+    np.maximum.at(out['last_event_ns'], event_user_idx, timestamps_ns)
+
+    user_days = np.sort(pack_user_days(event_user_idx, timestamps_ns))
+    user_days = user_days[_run_starts(user_days)]
+    out['active_days'] = np.bincount(user_days >> DAY_BITS, minlength=n_users)
+
+    n_types = int(event_type_codes.max(initial=-1)) + 1
+    type_keys = event_user_idx * n_types + event_type_codes
+    seen = np.zeros(n_users * n_types, dtype=bool)
+    seen[type_keys[event_type_codes >= 0]] = True
+    out['event_type_diversity'] = seen.reshape(n_users, n_types).sum(axis=1)
+
+    return out
+
+
+def map_user_index(user_ids: np.ndarray, event_user_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(positions in ``user_ids``, matched mask) for event user_ids."""
+    if len(user_ids) == 0:
+        return np.zeros(len(event_user_ids), dtype=np.int64), np.zeros(len(event_user_ids), dtype=bool)
+
+    min_id, max_id = user_ids.min(), user_ids.max()
+    if max_id - min_id < 4 * len(user_ids) + 1024:
+        lookup = np.full(max_id - min_id + 1, -1, dtype=np.int64)
+        lookup[user_ids - min_id] = np.arange(len(user_ids))
+        offsets = event_user_ids - min_id
+        in_range = (offsets >= 0) & (offsets < len(lookup))
+        if not in_range.all():
+            offsets = np.where(in_range, offsets, 0)
+        positions = lookup[offsets]
+        matched = in_range & (positions >= 0)
+        return np.maximum(positions, 0), matched
+
+    sort_idx = np.argsort(user_ids)
+    sorted_ids = user_ids[sort_idx]
+    pos = np.minimum(np.searchsorted(sorted_ids, event_user_ids), len(sorted_ids) - 1)
+    return sort_idx[pos], sorted_ids[pos] == event_user_ids
+
+
+def build_feature_frame(
+    users_df: pd.DataFrame,
+    agg: Dict[str, np.ndarray],
+    reference_time: Optional[pd.Timestamp] = None
+) -> pd.DataFrame:
+    """Model feature frame from per-user aggregates aligned with ``users_df``."""
+    if reference_time is None:
+        reference_time = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    reference_ns = to_epoch_ns([reference_time])[0]
+
+    last_seen = to_epoch_ns(users_df['last_active'])
+    last_seen = np.where(last_seen == NAT_NS, agg['last_event_ns'], last_seen)
+    if 'created_at' in users_df:
+        last_seen = np.where(last_seen == NAT_NS, to_epoch_ns(users_df['created_at']), last_seen)
+    days_since = np.where(last_seen == NAT_NS, np.nan, (reference_ns - last_seen) / NS_PER_DAY)
+
+    count = agg['duration_count']
+    avg_duration = np.divide(
+        agg['duration_sum'], count,
+        out=np.zeros(len(count), dtype=np.float64),
+        where=count > 0
+    )
+
+    tier_codes = pd.Index(SUBSCRIPTION_TIERS).get_indexer(users_df['subscription_tier'].astype(object))
+    tier_encoded = np.where(tier_codes < 0, 0, tier_codes).astype(np.int64)
+
+    return pd.DataFrame({
+        'user_id': users_df['user_id'].to_numpy(dtype=np.int64),
+        'days_since_last_active': days_since,
+        'total_events': agg['total_events'],
+        'avg_session_duration': avg_duration,
+        'active_days': agg['active_days'],
+        'subscription_tier_encoded': tier_encoded,
+        'event_type_diversity': agg['event_type_diversity'],
+        'churned': users_df['churned'].fillna(False).to_numpy(dtype=np.int64),
+    })
+
+
+def extract_user_features(
+    users_df: pd.DataFrame,
+    events_df: pd.DataFrame,
+    reference_time: Optional[pd.Timestamp] = None
+) -> pd.DataFrame:
+    """One row of model features per user; events for unknown users are ignored."""
+    user_idx, matched = map_user_index(
+        users_df['user_id'].to_numpy(dtype=np.int64),
+        events_df['user_id'].to_numpy(dtype=np.int64)
+    )
+    event_type_codes, _ = encode_categories(events_df['event_type'])
+    session_durations = events_df['session_duration'].to_numpy(dtype=np.float64)
+    timestamps_ns = to_epoch_ns(events_df['timestamp'])
+
+    if not matched.all():
+        user_idx = user_idx[matched]
+        event_type_codes = event_type_codes[matched]
+        session_durations = session_durations[matched]
+        timestamps_ns = timestamps_ns[matched]
+
+    agg = aggregate_events(user_idx, len(users_df), event_type_codes, session_durations, timestamps_ns)
+
+    return build_feature_frame(users_df, agg, reference_time)
+
+
+class FeatureAccumulator:
+    """Folds event chunks into per-user aggregates; memory grows with users, not events."""
+
+    MAX_EVENT_TYPES = 64
+
+    STATE_ARRAYS = {
+        'total_events': (np.int64, 0),
+        'duration_sum': (np.float64, 0.0),
+        'duration_count': (np.int64, 0),
+        'last_event_ns': (np.int64, NAT_NS),
+        'event_type_mask': (np.uint64, 0),
+    }
+
+    def __init__(self, user_ids: np.ndarray, compact_every: int = 8):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        for name, (dtype, fill) in self.STATE_ARRAYS.items():
+            setattr(self, name, np.full(len(self.user_ids), fill, dtype=dtype))
+        self.event_types: List[str] = []
+        self.n_events = 0
+        self._user_days = np.zeros(0, dtype=np.int64)
+        self._pending_days: List[np.ndarray] = []
+        self._compact_every = compact_every
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], event_types: List[str], n_events: int = 0) -> 'FeatureAccumulator':
+        """
+        Rebuild an accumulator from the output of ``state_dict``.
+        """
+        accumulator = cls(arrays['user_ids'])
+        for name in cls.STATE_ARRAYS:
+            setattr(accumulator, name, np.array(arrays[name], dtype=cls.STATE_ARRAYS[name][0]))
+        accumulator._user_days = np.array(arrays['user_days'], dtype=np.int64)
+        accumulator.event_types = list(event_types)
+        accumulator.n_events = n_events
+        return accumulator
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        """
+        Arrays that fully describe the accumulator (see ``from_state``).
+        """
+        self._compact()
+        arrays = {name: getattr(self, name) for name in self.STATE_ARRAYS}
+        arrays['user_ids'] = self.user_ids
+        arrays['user_days'] = self._user_days
+        return arrays
+
+    def add_users(self, user_ids: np.ndarray):
+        """
+        Append rows for user_ids that are not tracked yet.
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        _, known = map_user_index(self.user_ids, user_ids)
+        new_ids = np.unique(user_ids[~known])
+        if len(new_ids) == 0:
+            return
+        self.user_ids = np.concatenate([self.user_ids, new_ids])
+        for name, (dtype, fill) in self.STATE_ARRAYS.items():
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(len(new_ids), fill, dtype=dtype)]))
+
+    def _type_bits(self, event_types: pd.Series) -> np.ndarray:
+        codes, uniques = encode_categories(event_types)
+        positions = []
+        for name in uniques:
+            if name not in self.event_types:
+                if len(self.event_types) >= self.MAX_EVENT_TYPES:
+                    raise ValueError(f"More than {self.MAX_EVENT_TYPES} distinct event types")
+                self.event_types.append(name)
+            positions.append(self.event_types.index(name))
+        bit_lookup = np.left_shift(np.uint64(1), np.array(positions + [0], dtype=np.uint64))
+        bit_lookup[-1] = 0
+        return bit_lookup[codes]
+
+    def update(self, events: pd.DataFrame, add_unknown_users: bool = False):
+        """Fold one event chunk; unknown users are ignored unless ``add_unknown_users`` is set."""
+        event_user_ids = events['user_id'].to_numpy(dtype=np.int64)
+        if add_unknown_users:
+            self.add_users(event_user_ids)
+        user_idx, matched = map_user_index(self.user_ids, event_user_ids)
+        bits = self._type_bits(events['event_type'])
+        durations = events['session_duration'].to_numpy(dtype=np.float64)
+        timestamps_ns = to_epoch_ns(events['timestamp'])
+
+        if not matched.all():
+            user_idx, bits = user_idx[matched], bits[matched]
+            durations, timestamps_ns = durations[matched], timestamps_ns[matched]
+        if len(user_idx) == 0:
+            return
+
+        valid = ~np.isnan(durations)
+        np.add.at(self.total_events, user_idx, 1)
+        np.add.at(self.duration_sum, user_idx[valid], durations[valid])
+        np.add.at(self.duration_count, user_idx[valid], 1)
+        np.maximum.at(self.last_event_ns, user_idx, timestamps_ns)
+        np.bitwise_or.at(self.event_type_mask, user_idx, bits)
+
+        user_days = np.sort(pack_user_days(user_idx, timestamps_ns))
+        self._pending_days.append(user_days[_run_starts(user_days)])
+        if len(self._pending_days) >= self._compact_every:
+            self._compact()
+
+        self.n_events += len(user_idx)
+
+    def _compact(self):
+        if self._pending_days:
+            merged = np.sort(np.concatenate([self._user_days] + self._pending_days))
+            self._user_days = merged[_run_starts(merged)]
+            self._pending_days = []
+
+    def finalize(self, user_ids: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Aggregates as ``aggregate_events`` returns them, optionally aligned to ``user_ids``."""
+        self._compact()
+        agg = {
+            'total_events': self.total_events.copy(),
+            'duration_sum': self.duration_sum.copy(),
+            'duration_count': self.duration_count.copy(),
+            'last_event_ns': self.last_event_ns.copy(),
+            'active_days': np.bincount(self._user_days >> DAY_BITS, minlength=len(self.user_ids)),
+            'event_type_diversity': _popcount(self.event_type_mask),
+        }
+        if user_ids is None:
+            return agg
+
+        positions, matched = map_user_index(self.user_ids, np.asarray(user_ids, dtype=np.int64))
+        aligned = {}
+        for name, values in agg.items():
+            fill = NAT_NS if name == 'last_event_ns' else 0
+            if len(values) == 0:
+                aligned[name] = np.full(len(positions), fill, dtype=values.dtype)
+            else:
+                aligned[name] = np.where(matched, values[positions], fill).astype(values.dtype)
+        return aligned
+
+
+def normalize_features(df: pd.DataFrame, feature_cols: List[str]) -> Tuple[pd.DataFrame, Dict[str, Dict[str, float]]]:
+    """Standardize feature columns; returns the copy and each column's mean and std."""
+    values = df[feature_cols].to_numpy(dtype=np.float64)
+    mean = np.nanmean(values, axis=0) if len(values) else np.zeros(len(feature_cols))
+    std = np.nanstd(values, axis=0) if len(values) else np.ones(len(feature_cols))
+    std = np.where(std > 0, std, 1.0)
+
+    normalized = df.copy()
+    normalized[feature_cols] = np.nan_to_num((values - mean) / std)
+
+    norm_params = {
+        col: {'mean': float(m), 'std': float(s)}
+        for col, m, s in zip(feature_cols, mean, std)
+    }
+    return normalized, norm_params
+
+
+def create_train_test_split(
+    df: pd.DataFrame,
+    test_size: float = 0.2,
+    random_state: int = 42
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Train/test split, stratified on ``churned`` when both classes are present."""
+    stratify = df['churned'] if df['churned'].nunique() > 1 else None
+    train_df, test_df = train_test_split(
+        df,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=stratify
+    )
+    return train_df.reset_index(drop=True), test_df.reset_index(drop=True)
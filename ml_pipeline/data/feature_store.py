@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.extract_from_db import stream_events
+from data.feature_engineering import NAT_NS, FeatureAccumulator, build_feature_frame, to_epoch_ns
+
+
+FORMAT_VERSION = 1
+
+# Per-user arrays of a snapshot that feature building needs.
+FEATURE_ARRAYS = ['total_events', 'duration_sum', 'duration_count', 'last_event_ns',
+                  'active_days', 'event_type_diversity']
+
+
+class FeatureStore:
+    """Per-user event aggregates in .npy snapshots, published by replacing meta.json."""
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = os.getenv('FEATURE_STORE_PATH', './feature_store')
+        self.path = Path(path)
+        self.meta = self._load_meta()
+
+    def _load_meta(self) -> Dict:
+        meta_file = self.path / 'meta.json'
+        if meta_file.exists():
+            with open(meta_file, 'r') as f:
+                return json.load(f)
+        return {
+            'format_version': FORMAT_VERSION,
+            'snapshot': None,
+            'watermark_event_id': 0,
+            'watermark_timestamp': None,
+            'pending_event_ranges': [],
+            'event_types': [],
+            'n_events': 0,
+        }
+
+    @property
+    def watermark_event_id(self) -> int:
+        return self.meta['watermark_event_id']
+
+    def load_accumulator(self) -> FeatureAccumulator:
+        """
+        Accumulator holding the state of the active snapshot.
+        """
+        if self.meta['snapshot'] is None:
+            return FeatureAccumulator(np.zeros(0, dtype=np.int64))
+
+        snapshot_dir = self.path / self.meta['snapshot']
+        arrays = {f.stem: np.load(f) for f in snapshot_dir.glob('*.npy')}
+        return FeatureAccumulator.from_state(arrays, self.meta['event_types'], self.meta['n_events'])
+
+    def save(self, accumulator: FeatureAccumulator, watermark_event_id: int, watermark_timestamp: Optional[str],
+             pending_event_ranges: Optional[List[List[int]]] = None):
+        """
+        Persist the accumulator as a new snapshot and advance the watermark.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        previous = self.meta['snapshot']
+        sequence = int(previous.rsplit('_', 1)[1]) + 1 if previous else 1
+        snapshot = f"snapshot_{sequence:06d}"
+
+        snapshot_dir = self.path / snapshot
+        snapshot_dir.mkdir()
+        arrays = accumulator.state_dict()
+        arrays.update({
+            name: values
+            for name, values in accumulator.finalize().items()
+            if name in ('active_days', 'event_type_diversity')
+        })
+        for name, values in arrays.items():
+            np.save(snapshot_dir / f"{name}.npy", values)
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'snapshot': snapshot,
+            'watermark_event_id': int(watermark_event_id),
+            'watermark_timestamp': watermark_timestamp,
+            'pending_event_ranges': pending_event_ranges or [],
+            'event_types': accumulator.event_types,
+            'n_events': int(accumulator.n_events),
+            'n_users': int(len(accumulator.user_ids)),
+            'updated_at': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        }
+        tmp_file = self.path / 'meta.json.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_file, self.path / 'meta.json')
+        self.meta = meta
+
+        if previous:
+            shutil.rmtree(self.path / previous, ignore_errors=True)
+
+    def refresh(self, database_url: str = None, chunk_size: int = 500_000) -> int:
+        """Fold events past the watermark, and late commits in pending gaps, into the store."""
+        accumulator = self.load_accumulator()
+        base_event_id = watermark_event_id = self.meta['watermark_event_id']
+        watermark_timestamp = self.meta['watermark_timestamp']
+        pending = self.meta.get('pending_event_ranges', [])
+        n_before = accumulator.n_events
+
+        snapshot: Dict = {}
+        late_ids, gaps = [], []
+        for chunk in stream_events(
+            database_url,
+            chunk_size=chunk_size,
+            columns=['event_id', 'user_id', 'event_type', 'session_duration', 'timestamp'],
+            after_event_id=base_event_id,
+            include_event_ranges=[(first, last) for first, last, _ in pending],
+            snapshot=snapshot
+        ):
+            accumulator.update(chunk, add_unknown_users=True)
+            event_ids = chunk['event_id'].to_numpy(dtype=np.int64)
+            late_ids.append(event_ids[event_ids <= base_event_id])
+            fresh = event_ids[event_ids > base_event_id]
+            if len(fresh):
+                previous = np.concatenate([[watermark_event_id], fresh[:-1]])
+                for i in np.flatnonzero(fresh - previous > 1):
+                    gaps.append([int(previous[i]) + 1, int(fresh[i]) - 1])
+                watermark_event_id = int(fresh[-1])
+            latest = pd.Timestamp(to_epoch_ns(chunk['timestamp']).max())
+            if watermark_timestamp is None or latest > pd.Timestamp(watermark_timestamp):
+                watermark_timestamp = latest.isoformat()
+
+        still_pending = _open_ranges(pending, np.concatenate(late_ids) if late_ids else np.zeros(0, np.int64),
+                                     snapshot['xmin'])
+        if snapshot['in_progress']:
+            # Transactions open now may still commit into these gaps.
+            still_pending += [[first, last, snapshot['xmax']] for first, last in gaps]
+
+        n_new = accumulator.n_events - n_before
+        if n_new or self.meta['snapshot'] is None or still_pending != pending:
+            self.save(accumulator, watermark_event_id, watermark_timestamp, still_pending)
+
+        print(f"Feature store refreshed: {n_new} new events, watermark event_id={watermark_event_id}, "
+              f"{len(still_pending)} pending gaps")
+        return n_new
+
+    def features(self, users_df: pd.DataFrame, reference_time: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Model features for the users in ``users_df`` from stored aggregates.
+        """
+        accumulator = self.load_accumulator()
+        agg = accumulator.finalize(users_df['user_id'].to_numpy(dtype=np.int64))
+        return build_feature_frame(users_df, agg, reference_time)
+
+    def iter_features(self, users_chunks: Iterable[pd.DataFrame],
+                      reference_time: Optional[pd.Timestamp] = None) -> Iterator[pd.DataFrame]:
+        """Model features for each chunk of users, from the memory-mapped snapshot."""
+        if self.meta['snapshot'] is None:
+            user_ids = np.zeros(0, dtype=np.int64)
+            arrays = {name: np.zeros(0, dtype=np.int64) for name in FEATURE_ARRAYS}
+        else:
+            snapshot_dir = self.path / self.meta['snapshot']
+            user_ids = np.load(snapshot_dir / 'user_ids.npy', mmap_mode='r')
+            arrays = {name: np.load(snapshot_dir / f"{name}.npy", mmap_mode='r') for name in FEATURE_ARRAYS}
+        order = np.argsort(user_ids)
+
+        for users_df in users_chunks:
+            chunk_ids = users_df['user_id'].to_numpy(dtype=np.int64)
+            if len(order):
+                rows = order[np.minimum(np.searchsorted(user_ids, chunk_ids, sorter=order), len(order) - 1)]
+                matched = user_ids[rows] == chunk_ids
+            else:
+                rows, matched = np.zeros(len(chunk_ids), dtype=np.int64), np.zeros(len(chunk_ids), dtype=bool)
+            agg = {
+                name: np.where(matched, values[rows] if len(values) else 0,
+                               NAT_NS if name == 'last_event_ns' else 0).astype(values.dtype)
+                for name, values in arrays.items()
+            }
+            yield build_feature_frame(users_df, agg, reference_time)
+
+
+def _open_ranges(pending: List[List[int]], found: np.ndarray, xmin: int) -> List[List[int]]:
+    """Pending [first, last, until_xid] gaps, minus the ids just read and gaps whose transactions finished."""
+    found = np.sort(found)
+    remaining = []
+    for first, last, until_xid in pending:
+        if xmin >= until_xid:
+            continue
+        ids = found[(found >= first) & (found <= last)]
+        bounds = np.concatenate([[first - 1], ids, [last + 1]])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi - lo > 1:
+                remaining.append([int(lo) + 1, int(hi) - 1, until_xid])
+    return remaining
+
+
+if __name__ == "__main__":
+    store = FeatureStore()
+    store.refresh()
+    print(f"{store.meta['n_users']} users, {store.meta['n_events']} events in {store.path}")
@@ -0,0 +1,149 @@
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.extract_from_db import FEATURE_EVENT_COLUMNS, extract_users, stream_events
+
+
+SNAPSHOT_EVENT_COLUMNS = ['event_id', 'user_id', 'event_type', 'event_data', 'session_duration', 'timestamp']
+
+EVENT_PARTITIONING = ds.partitioning(pa.schema([('event_month', pa.string())]), flavor='hive')
+
+
+def _with_event_month(events_df: pd.DataFrame) -> pa.Table:
+    events_df = events_df.assign(event_month=events_df['timestamp'].dt.strftime('%Y-%m'))
+    if isinstance(events_df['event_type'].dtype, pd.CategoricalDtype):
+        events_df['event_type'] = events_df['event_type'].astype(str)
+    return pa.Table.from_pandas(events_df, preserve_index=False)
+
+
+def _write_events(table: pa.Table, events_dir: Path, part: int, row_group_size: int):
+    ds.write_dataset(
+        table.sort_by('timestamp'),
+        events_dir,
+        format='parquet',
+        partitioning=EVENT_PARTITIONING,
+        basename_template=f"part-{part:05d}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',  # parts of one fresh directory
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, 1 << 16),
+    )
+
+
+def _replace_dir(new_dir: Path, target: Path):
+    """Swap a freshly written directory in for ``target``."""
+    old_dir = target.with_name(f".{target.name}.old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if target.exists():
+        target.rename(old_dir)
+    new_dir.rename(target)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _fresh_dir(target: Path) -> Path:
+    new_dir = target.with_name(f".{target.name}.new")
+    shutil.rmtree(new_dir, ignore_errors=True)
+    return new_dir
+
+
+def save_snapshot(
+    users_df: pd.DataFrame,
+    events_df: pd.DataFrame,
+    output_dir: str = "./data/snapshot",
+    row_group_size: int = 1_000_000
+) -> str:
+    """Write users and month-partitioned events as a Parquet snapshot, replacing any previous one."""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    pq.write_table(pa.Table.from_pandas(users_df, preserve_index=False), output_path / 'users.parquet')
+    events_dir = _fresh_dir(output_path / 'events')
+    _write_events(_with_event_month(events_df), events_dir, 0, row_group_size)
+    _replace_dir(events_dir, output_path / 'events')
+
+    print(f"Snapshot saved to {output_path}/")
+    return str(output_path)
+
+
+def snapshot_from_db(
+    database_url: str = None,
+    output_dir: str = "./data/snapshot",
+    chunk_size: int = 1_000_000,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> str:
+    """Stream users and [start, end) events from Postgres into a Parquet snapshot."""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    users_df = extract_users(database_url)
+    pq.write_table(pa.Table.from_pandas(users_df, preserve_index=False), output_path / 'users.parquet')
+
+    events_dir = _fresh_dir(output_path / 'events')
+    events_dir.mkdir()
+    n_events = 0
+    for part, chunk in enumerate(stream_events(
+        database_url, chunk_size=chunk_size, columns=SNAPSHOT_EVENT_COLUMNS, start=start, end=end
+    )):
+        _write_events(_with_event_month(chunk), events_dir, part, chunk_size)
+        n_events += len(chunk)
+    _replace_dir(events_dir, output_path / 'events')
+
+    print(f"Snapshot of {len(users_df)} users and {n_events} events saved to {output_path}/")
+    return str(output_path)
+
+
+def load_snapshot(
+    snapshot_dir: str = "./data/snapshot",
+    columns: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read a snapshot's ``columns``, skipping partitions and row groups outside [start, end)."""
+    snapshot_path = Path(snapshot_dir)
+    if columns is None:
+        columns = FEATURE_EVENT_COLUMNS
+
+    users_df = pq.read_table(snapshot_path / 'users.parquet', memory_map=True).to_pandas()
+
+    events = ds.dataset(
+        str(snapshot_path / 'events'),
+        format='parquet',
+        partitioning=EVENT_PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    timestamp_type = events.schema.field('timestamp').type
+
+    predicate = None
+    if start is not None:
+        start = pd.Timestamp(start)
+        predicate = (ds.field('event_month') >= start.strftime('%Y-%m')) & \
+            (ds.field('timestamp') >= pa.scalar(start.to_pydatetime(), type=timestamp_type))
+    if end is not None:
+        end = pd.Timestamp(end)
+        upper = (ds.field('event_month') <= end.strftime('%Y-%m')) & \
+            (ds.field('timestamp') < pa.scalar(end.to_pydatetime(), type=timestamp_type))
+        predicate = upper if predicate is None else predicate & upper
+
+    events_df = events.to_table(columns=columns, filter=predicate).to_pandas()
+    if 'event_type' in events_df:
+        events_df['event_type'] = events_df['event_type'].astype('category')
+
+    print(f"Loaded {len(users_df)} users and {len(events_df)} events from {snapshot_path}")
+    return users_df, events_df
+
+
+if __name__ == "__main__":
+    snapshot_from_db(output_dir=sys.argv[1] if len(sys.argv) > 1 else "./data/snapshot")
@@ -0,0 +1,136 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+MAGIC = b"CHURNMDL"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+ARTIFACT_SUFFIX = ".mdl"
+
+ALLOWED_DTYPES = {'float16', 'float32', 'float64', 'int8', 'int32', 'int64', 'uint8', 'uint32', 'bool'}
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _json_default(value):
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def flatten_params(params: Dict, prefix: str = "") -> Dict[str, np.ndarray]:
+    """
+    Flatten a nested params dict to {'a/b/c': array}.
+    """
+    flat = {}
+    for key, value in params.items():
+        name = f"{prefix}/{key}" if prefix else str(key)
+        if isinstance(value, dict) or hasattr(value, 'items'):
+            flat.update(flatten_params(value, name))
+        else:
+            flat[name] = np.asarray(value)
+    return flat
+
+
+def unflatten_params(flat: Dict[str, np.ndarray]) -> Dict:
+    params: Dict = {}
+    for name, value in flat.items():
+        node = params
+        *parents, leaf = name.split('/')
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return params
+
+
+def save_artifact(path: str, params: Dict, header: Dict) -> str:
+    """
+    Write params and a JSON header into one contiguous file.
+
+    Layout: 8-byte magic, little-endian uint64 header length, UTF-8 JSON
+    header, then every tensor's raw bytes at a 64-byte aligned offset. The
+    header lists each tensor's name, dtype, shape and offset, so a reader
+    can memory-map the file and view the tensors in place.
+    """
+    flat = flatten_params(params)
+
+    tensors = []
+    offset = 0
+    for name, array in flat.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.name not in ALLOWED_DTYPES:
+            raise ValueError(f"Unsupported dtype {array.dtype} for tensor {name}")
+        offset = _align(offset)
+        tensors.append({'name': name, 'dtype': array.dtype.name, 'shape': list(array.shape), 'offset': offset})
+        flat[name] = array
+        offset += array.nbytes
+
+    header = dict(header, format_version=FORMAT_VERSION, tensors=tensors)
+    header_bytes = json.dumps(header, default=_json_default).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, 'little'))
+        f.write(header_bytes)
+        for tensor in tensors:
+            f.write(b'\0' * (data_start + tensor['offset'] - f.tell()))
+            f.write(flat[tensor['name']].tobytes())
+    os.replace(tmp_path, path)
+
+    return str(path)
+
+
+def _read_header(buffer) -> Tuple[Dict, int]:
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a model artifact (bad magic)")
+    header_len = int.from_bytes(bytes(buffer[len(MAGIC):len(MAGIC) + 8]), 'little')
+    header_start = len(MAGIC) + 8
+    header = json.loads(bytes(buffer[header_start:header_start + header_len]).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {header.get('format_version')}")
+    return header, _align(header_start + header_len)
+
+
+def read_header(path: str) -> Dict:
+    """
+    Read only the JSON header (version, metrics, feature order, ...).
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(len(MAGIC) + 8)
+        header_len = int.from_bytes(prefix[len(MAGIC):], 'little')
+        header, _ = _read_header(prefix + f.read(header_len))
+    return header
+
+
+def load_artifact(path: str) -> Tuple[Dict, Dict]:
+    """
+    Memory-map an artifact and return (params, header).
+
+    Params are read-only ndarray views into the mapping, so nothing is
+    copied or deserialized beyond the JSON header, and no code is executed.
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    header, data_start = _read_header(buffer)
+
+    flat = {}
+    for tensor in header['tensors']:
+        if tensor['dtype'] not in ALLOWED_DTYPES:
+            raise ValueError(f"Unsupported dtype {tensor['dtype']} for tensor {tensor['name']}")
+        dtype = np.dtype(tensor['dtype'])
+        shape = tuple(tensor['shape'])
+        start = data_start + tensor['offset']
+        end = start + dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        if end > len(buffer):
+            raise ValueError(f"Tensor {tensor['name']} extends past end of file")
+        flat[tensor['name']] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=start)
+
+    return unflatten_params(flat), header
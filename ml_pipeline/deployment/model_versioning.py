@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Dict, Optional
 import json
+import os
 from pathlib import Path
 
 
@@ -23,8 +24,10 @@ class ModelVersioning:
     
     def _save_registry(self):
                                    
-        with open(self.registry_path, 'w') as f:
+        tmp_path = self.registry_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump(self.registry, f, indent=2)
+        os.replace(tmp_path, self.registry_path)
     
     def register_model(
         self,
@@ -81,3 +84,29 @@ class ModelVersioning:
 \
            
         return self.registry["models"]
+    
+    def set_active(self, version: str):
+        """
+        Mark ``version`` as the model the API should serve. Running API
+        processes pick the change up and hot-swap without a restart.
+        """
+        if not any(m["version"] == version for m in self.registry["models"]):
+            raise ValueError(f"Unknown model version: {version}")
+        
+        self.registry["active"] = {
+            "version": version,
+            "activated_at": datetime.now().isoformat()
+        }
+        self._save_registry()
+        
+        print(f"Activated model {version}")
+    
+    def get_active_model(self) -> Optional[Dict]:
+        active = self.registry.get("active")
+        if not active:
+            return None
+        
+        for model in self.registry["models"]:
+            if model["version"] == active["version"]:
+                return model
+        return None
@@ -6,6 +6,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+MODEL_SUFFIXES = ('.mdl', '.pkl')
+
 
 class ModelStorage:
 \
@@ -78,7 +80,10 @@ class ModelStorage:
 \
            
         if self.storage_type == "local":
-            return [f.name for f in self.local_path.glob("model_*.pkl")]
+            return sorted(
+                f.name for f in self.local_path.glob("model_*")
+                if f.suffix in MODEL_SUFFIXES
+            )
         
         elif self.storage_type == "s3":
             try:
@@ -86,7 +91,10 @@ class ModelStorage:
                     Bucket=self.bucket_name,
                     Prefix=self.s3_prefix
                 )
-                return [obj['Key'] for obj in response.get('Contents', [])]
+                return [
+                    obj['Key'] for obj in response.get('Contents', [])
+                    if obj['Key'].endswith(MODEL_SUFFIXES)
+                ]
             except Exception as e:
                 logger.error(f"S3 list failed: {e}")
                 return []
@@ -0,0 +1,122 @@
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import jax
+import numpy as np
+from flax import serialization
+
+
+CHECKPOINT_PATTERN = re.compile(r"^checkpoint_(\d+)\.msgpack$")
+
+
+class CheckpointManager:
+    """
+    Periodic, resumable checkpoints of the full training state.
+
+    A checkpoint holds the TrainState (params, optimizer state, step), the
+    base RNG key, the number of completed epochs and the loss history, plus
+    the best state so far and the early stopping counters when early
+    stopping is on.
+    Writes run on a single background thread: JAX arrays are immutable, so
+    the training loop hands over references and keeps going while the
+    writer pulls them to host, serializes and atomically renames the file.
+    """
+
+    def __init__(self, directory: str, keep: int = 3):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending: List[Future] = []
+
+    def _path(self, epoch: int) -> Path:
+        return self.directory / f"checkpoint_{epoch:06d}.msgpack"
+
+    def epochs(self) -> List[int]:
+        epochs = []
+        for f in self.directory.iterdir():
+            match = CHECKPOINT_PATTERN.match(f.name)
+            if match:
+                epochs.append(int(match.group(1)))
+        return sorted(epochs)
+
+    def latest_epoch(self) -> Optional[int]:
+        epochs = self.epochs()
+        return epochs[-1] if epochs else None
+
+    def save(self, epoch: int, state, rng, history: Dict[str, list],
+             best_state=None, early_stopping: Optional[Dict] = None) -> Future:
+        """
+        Schedule an asynchronous checkpoint for ``epoch`` completed epochs.
+        History entries may be floats or device arrays of step losses.
+        ``early_stopping`` holds plain values (best loss, counters, whether
+        training has stopped).
+        """
+        history = {name: list(values) for name, values in history.items()}
+        early_stopping = dict(early_stopping) if early_stopping is not None else None
+        future = self._executor.submit(self._write, epoch, state, rng, history, best_state, early_stopping)
+        self._pending = [f for f in self._pending if not f.done()] + [future]
+        return future
+
+    def _write(self, epoch: int, state, rng, history: Dict[str, list], best_state, early_stopping: Optional[Dict]):
+        payload = {
+            'epoch': epoch,
+            'state': serialization.to_state_dict(jax.device_get(state)),
+            'rng': np.asarray(jax.device_get(rng)),
+            'history': {
+                name: [float(np.mean(value)) for value in jax.device_get(values)]
+                for name, values in history.items()
+            },
+        }
+        if best_state is not None:
+            payload['best_state'] = serialization.to_state_dict(jax.device_get(best_state))
+        if early_stopping is not None:
+            payload['early_stopping'] = early_stopping
+        path = self._path(epoch)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(serialization.msgpack_serialize(payload))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        for old_epoch in self.epochs()[:-self.keep]:
+            self._path(old_epoch).unlink(missing_ok=True)
+
+    def restore(
+        self, target_state, epoch: Optional[int] = None
+    ) -> Tuple[object, np.ndarray, int, Dict[str, list], object, Optional[Dict]]:
+        """
+        Load a checkpoint (the latest by default) into the structure of
+        ``target_state``. Returns (state, rng, epoch, history, best_state,
+        early_stopping); the last two are None if the checkpoint has none.
+        """
+        if epoch is None:
+            epoch = self.latest_epoch()
+        if epoch is None:
+            raise FileNotFoundError(f"No checkpoints in {self.directory}")
+
+        with open(self._path(epoch), 'rb') as f:
+            payload = serialization.msgpack_restore(f.read())
+
+        state = serialization.from_state_dict(target_state, payload['state'])
+        history = {name: list(values) for name, values in payload['history'].items()}
+        best_state = None
+        if 'best_state' in payload:
+            best_state = serialization.from_state_dict(target_state, payload['best_state'])
+        return state, payload['rng'], int(payload['epoch']), history, best_state, payload.get('early_stopping')
+
+    def wait(self):
+        """
+        Block until all scheduled checkpoints are on disk.
+        """
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
@@ -0,0 +1,193 @@
+import argparse
+import itertools
+import os
+import sys
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Tuple
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+import optax
+from flax.training import train_state
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.jax_classifier import ChurnPredictor
+from data.feature_engineering import FEATURE_COLUMNS, normalize_features, create_train_test_split
+from deployment.model_versioning import ModelVersioning
+from training.train import eval_step, evaluate_model, load_features, save_model, train_epoch
+
+
+def create_replica_states(model, keys: jnp.ndarray, learning_rates: jnp.ndarray, input_shape) -> train_state.TrainState:
+    """
+    Stacked TrainStates, one per replica along the leading axis.
+
+    Adam is wrapped in ``optax.inject_hyperparams`` so the learning rate
+    lives in the optimizer state and can differ per replica under vmap.
+    """
+    tx = optax.inject_hyperparams(optax.adam)(learning_rate=float(learning_rates[0]))
+
+    def init(key):
+        params = model.init(key, jnp.ones(input_shape))
+        return train_state.TrainState.create(apply_fn=model.apply, params=params, tx=tx)
+
+    states = jax.vmap(init)(keys)
+    hyperparams = dict(states.opt_state.hyperparams, learning_rate=learning_rates)
+    return states.replace(opt_state=states.opt_state._replace(hyperparams=hyperparams))
+
+
+def unstack_state(states: train_state.TrainState, index: int) -> train_state.TrainState:
+    return jax.tree_util.tree_map(lambda x: x[index], states)
+
+
+def train_replicas(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    learning_rates: List[float],
+    seeds: List[int],
+    batch_size: int,
+    epochs: int
+) -> Tuple[train_state.TrainState, np.ndarray, List[Dict]]:
+    """
+    Train every (learning_rate, seed) combination as one vmapped program.
+
+    Each epoch is ``train_epoch`` vmapped over replica states and shuffle
+    keys, so all replicas share one compilation and one dispatch per epoch.
+    Returns the stacked states, the final test losses and the replica
+    configurations in stacking order.
+    """
+    configs = [
+        {'learning_rate': lr, 'seed': seed, 'batch_size': batch_size}
+        for lr, seed in itertools.product(learning_rates, seeds)
+    ]
+    keys = jnp.stack([jax.random.PRNGKey(c['seed']) for c in configs])
+    lrs = jnp.array([c['learning_rate'] for c in configs], dtype=jnp.float32)
+
+    states = create_replica_states(ChurnPredictor(), keys, lrs, (1, X_train.shape[1]))
+
+    X_train_jax = jnp.array(X_train, dtype=jnp.float32)
+    y_train_jax = jnp.array(y_train, dtype=jnp.float32)
+    X_test_jax = jnp.array(X_test, dtype=jnp.float32)
+    y_test_jax = jnp.array(y_test, dtype=jnp.float32)
+
+    sweep_epoch = jax.jit(jax.vmap(partial(train_epoch, batch_size=batch_size), in_axes=(0, None, None, 0)))
+    sweep_eval = jax.jit(jax.vmap(eval_step, in_axes=(0, None, None)))
+
+    shuffle_keys = jax.vmap(lambda key: jax.random.fold_in(key, 1))(keys)
+    for epoch in range(epochs):
+        epoch_keys = jax.vmap(lambda key: jax.random.fold_in(key, epoch))(shuffle_keys)
+        states, _ = sweep_epoch(states, X_train_jax, y_train_jax, epoch_keys)
+
+        if (epoch + 1) % 10 == 0:
+            test_losses, _ = sweep_eval(states, X_test_jax, y_test_jax)
+            print(f"Epoch {epoch + 1}/{epochs} - Test Loss: best {float(test_losses.min()):.4f}, "
+                  f"worst {float(test_losses.max()):.4f}")
+
+    test_losses, _ = sweep_eval(states, X_test_jax, y_test_jax)
+    return states, np.asarray(test_losses), configs
+
+
+def run_sweep(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    learning_rates: List[float],
+    seeds: List[int],
+    batch_sizes: List[int],
+    epochs: int = 100,
+    metric: str = 'f1'
+) -> Tuple[train_state.TrainState, Dict, List[Dict]]:
+    """
+    Sweep learning rates x seeds x batch sizes.
+
+    Replicas with the same batch size train together in one vmapped
+    program (batch size changes array shapes, so each size compiles once).
+    Every replica is scored with ``evaluate_model``; returns the best state,
+    its result row and all result rows.
+    """
+    results = []
+    best_state, best_result = None, None
+
+    for batch_size in batch_sizes:
+        print(f"\nTraining {len(learning_rates) * len(seeds)} replicas with batch size {batch_size}...")
+        states, test_losses, configs = train_replicas(
+            X_train, y_train, X_test, y_test,
+            learning_rates, seeds, batch_size, epochs
+        )
+
+        for i, config in enumerate(configs):
+            state = unstack_state(states, i)
+            metrics = evaluate_model(state, X_test, y_test)
+            result = dict(config, test_loss=float(test_losses[i]), metrics=metrics)
+            results.append(result)
+
+            if best_result is None or metrics[metric] > best_result['metrics'][metric]:
+                best_state, best_result = state, result
+
+    return best_state, best_result, results
+
+
+def main(args):
+    print("=" * 60)
+    print("JAX Churn Prediction Hyperparameter Sweep")
+    print("=" * 60)
+
+    features_df = load_features(args.snapshot, args.since)
+    features_normalized, norm_params = normalize_features(features_df, FEATURE_COLUMNS)
+
+    print("\n3. Splitting data...")
+    train_df, test_df = create_train_test_split(features_normalized, test_size=0.2)
+    X_train, y_train = train_df[FEATURE_COLUMNS].values, train_df['churned'].values
+    X_test, y_test = test_df[FEATURE_COLUMNS].values, test_df['churned'].values
+
+    print("\n4. Running sweep...")
+    best_state, best_result, results = run_sweep(
+        X_train, y_train, X_test, y_test,
+        learning_rates=args.learning_rates,
+        seeds=args.seeds,
+        batch_sizes=args.batch_sizes,
+        epochs=args.epochs,
+        metric=args.metric
+    )
+
+    print("\nSweep Results:")
+    for result in sorted(results, key=lambda r: r['metrics'][args.metric], reverse=True):
+        print(f"  lr={result['learning_rate']:<8g} seed={result['seed']:<4} batch={result['batch_size']:<5} "
+              f"test_loss={result['test_loss']:.4f} {args.metric}={result['metrics'][args.metric]:.4f}")
+
+    print("\n5. Registering best model...")
+    version = f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    model_path = save_model(
+        best_state, version, best_result['metrics'], output_dir=args.output_dir, norm_params=norm_params
+    )
+    ModelVersioning(os.path.join(args.output_dir, "registry.json")).register_model(
+        version,
+        best_result['metrics'],
+        model_path,
+        metadata={
+            'learning_rate': best_result['learning_rate'],
+            'seed': best_result['seed'],
+            'batch_size': best_result['batch_size'],
+            'epochs': args.epochs,
+            'sweep_size': len(results),
+        }
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train many ChurnPredictor replicas in one vmapped program")
+    parser.add_argument('--snapshot', help="Train from a Parquet snapshot directory instead of Postgres")
+    parser.add_argument('--since', help="Only read snapshot events with timestamp >= SINCE")
+    parser.add_argument('--learning-rates', type=float, nargs='+', default=[0.0003, 0.001, 0.003, 0.01])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2, 3])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32])
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--metric', default='f1', help="Metric used to pick the model to register")
+    parser.add_argument('--output-dir', default="../../models")
+    main(parser.parse_args())
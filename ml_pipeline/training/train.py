@@ -1,22 +1,35 @@
 import jax
 import jax.numpy as jnp
+from jax.sharding import Mesh, NamedSharding, PartitionSpec as P
 import optax
 from flax.training import train_state
 import numpy as np
+import pandas as pd
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 from typing import Dict, Tuple
-import pickle
+from functools import partial
 from datetime import datetime
 from pathlib import Path
 import sys
 import os
+import argparse
+from typing import Optional
 
                               
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models.jax_classifier import ChurnPredictor
-from data.extract_from_db import extract_data_from_db
-from data.feature_engineering import extract_user_features, normalize_features, create_train_test_split
+from data.extract_from_db import extract_users
+from data.feature_engineering import FEATURE_COLUMNS, extract_user_features, normalize_features, create_train_test_split
+from data.feature_store import FeatureStore
+from data.snapshot import load_snapshot
+from training.checkpoint import CheckpointManager
+from deployment.artifact import ARTIFACT_SUFFIX, save_artifact
+
+
+# Activations of ChurnPredictor, recorded in every artifact so serving runs
+# the same function. Outputs are logits: the loss is sigmoid cross-entropy.
+MODEL_ACTIVATIONS = {'hidden': 'relu', 'output': 'linear'}
 
 
 class TrainState(train_state.TrainState):
@@ -35,8 +48,7 @@ def create_train_state(rng, model, learning_rate, input_shape):
     )
 
 
-@jax.jit
-def train_step(state, batch_x, batch_y):
+def _train_step(state, batch_x, batch_y):
                               
     def loss_fn(params):
         logits = state.apply_fn(params, batch_x)
@@ -48,6 +60,37 @@ def train_step(state, batch_x, batch_y):
     return state, loss
 
 
+train_step = jax.jit(_train_step)
+
+
+@partial(jax.jit, static_argnames=('batch_size', 'mesh'))
+def train_epoch(state, X, y, rng, batch_size: int, mesh: Optional[Mesh] = None):
+    """
+    Run one full epoch on device.
+
+    The data is shuffled with ``jax.random``, trimmed to whole batches,
+    reshaped to (n_batches, batch_size, ...) and folded through
+    ``_train_step`` with ``jax.lax.scan``, so an epoch is a single dispatch.
+    Returns the new state and the per-step losses as one array.
+    
+    With a ``mesh`` every batch is split along its batch dimension across
+    the mesh's 'data' axis while parameters stay replicated; XLA inserts
+    the gradient all-reduce, so the update equals the single-device one.
+    """
+    n_batches = X.shape[0] // batch_size
+    perm = jax.random.permutation(rng, X.shape[0])[:n_batches * batch_size]
+    batches_x = X[perm].reshape(n_batches, batch_size, X.shape[1])
+    batches_y = y[perm].reshape(n_batches, batch_size)
+    if mesh is not None:
+        batches_x = jax.lax.with_sharding_constraint(batches_x, NamedSharding(mesh, P(None, 'data', None)))
+        batches_y = jax.lax.with_sharding_constraint(batches_y, NamedSharding(mesh, P(None, 'data')))
+    
+    def body(state, batch):
+        return _train_step(state, *batch)
+    
+    return jax.lax.scan(body, state, (batches_x, batches_y))
+
+
 @jax.jit
 def eval_step(state, batch_x, batch_y):
                                 
@@ -56,6 +99,15 @@ def eval_step(state, batch_x, batch_y):
     return loss, logits
 
 
+def data_parallel_mesh() -> Mesh:
+    """
+    One-axis ('data') mesh over all local devices. On CPU hosts, set
+    XLA_FLAGS=--xla_force_host_platform_device_count=N before importing
+    jax to expose N devices.
+    """
+    return Mesh(np.array(jax.local_devices()), ('data',))
+
+
 def train_model(
     X_train: np.ndarray,
     y_train: np.ndarray,
@@ -64,7 +116,13 @@ def train_model(
     epochs: int = 100,
     batch_size: int = 32,
     learning_rate: float = 0.001,
-    random_seed: int = 42
+    random_seed: int = 42,
+    use_scan: bool = True,
+    data_parallel: bool = False,
+    checkpoint_dir: Optional[str] = None,
+    checkpoint_every: int = 10,
+    patience: Optional[int] = None,
+    min_delta: float = 0.0
 ) -> Tuple[train_state.TrainState, Dict]:
 \
 \
@@ -97,32 +155,106 @@ def train_model(
     print(f"Training for {epochs} epochs with batch size {batch_size}")
     print(f"Number of batches per epoch: {n_batches}")
     
-    for epoch in range(epochs):
-                               
-        perm = np.random.permutation(len(X_train))
-        X_train_shuffled = X_train_jax[perm]
-        y_train_shuffled = y_train_jax[perm]
+    mesh = None
+    replicated = None
+    if data_parallel:
+        mesh = data_parallel_mesh()
+        n_devices = mesh.devices.size
+        if batch_size % n_devices:
+            raise ValueError(f"batch_size {batch_size} is not divisible by {n_devices} devices")
+        print(f"Data parallel over {n_devices} devices ({batch_size // n_devices} samples per device per step)")
         
-                  
-        epoch_losses = []
-        for i in range(n_batches):
-            batch_x = X_train_shuffled[i * batch_size:(i + 1) * batch_size]
-            batch_y = y_train_shuffled[i * batch_size:(i + 1) * batch_size]
+        replicated = NamedSharding(mesh, P())
+        state, X_train_jax, y_train_jax = jax.device_put((state, X_train_jax, y_train_jax), replicated)
+        use_scan = True
+    
+    start_epoch = 0
+    checkpoints = None
+    best_state = None
+    early_stopping = {'best_loss': float('inf'), 'epochs_without_improvement': 0, 'stopped': False}
+    if checkpoint_dir:
+        checkpoints = CheckpointManager(checkpoint_dir)
+        if checkpoints.latest_epoch() is not None:
+            state, rng, start_epoch, history, best_state, saved_early_stopping = checkpoints.restore(state)
+            if saved_early_stopping is not None:
+                early_stopping.update(saved_early_stopping)
+            if mesh is not None:
+                state, best_state = jax.device_put((state, best_state), replicated)
+            print(f"Resumed from checkpoint at epoch {start_epoch}")
+    
+    shuffle_rng = jax.random.fold_in(rng, 1)
+    train_losses, test_losses = list(history['train_loss']), list(history['test_loss'])
+    
+    if best_state is None:
+        best_state = state
+    if early_stopping['stopped']:
+        print(f"Training already stopped early at epoch {start_epoch}, keeping the best checkpointed state")
+        state = best_state
+        start_epoch = epochs
+    
+    def checkpoint(n_epochs: int):
+        checkpoints.save(
+            n_epochs, state, rng, {'train_loss': train_losses, 'test_loss': test_losses},
+            best_state=best_state if patience is not None else None,
+            early_stopping=early_stopping if patience is not None else None
+        )
+    
+    for epoch in range(start_epoch, epochs):
+        if use_scan:
+            state, train_loss = train_epoch(
+                state, X_train_jax, y_train_jax,
+                jax.random.fold_in(shuffle_rng, epoch),
+                batch_size,
+                mesh
+            )
+        else:
+                                   
+            perm = np.random.permutation(len(X_train))
+            X_train_shuffled = X_train_jax[perm]
+            y_train_shuffled = y_train_jax[perm]
             
-            state, loss = train_step(state, batch_x, batch_y)
-            epoch_losses.append(float(loss))
-        
-        train_loss = np.mean(epoch_losses)
+                      
+            epoch_losses = []
+            for i in range(n_batches):
+                batch_x = X_train_shuffled[i * batch_size:(i + 1) * batch_size]
+                batch_y = y_train_shuffled[i * batch_size:(i + 1) * batch_size]
+                
+                state, loss = train_step(state, batch_x, batch_y)
+                epoch_losses.append(float(loss))
+            
+            train_loss = np.mean(epoch_losses)
         
                     
         test_loss, _ = eval_step(state, X_test_jax, y_test_jax)
         
-        history['train_loss'].append(train_loss)
-        history['test_loss'].append(float(test_loss))
+        train_losses.append(train_loss)
+        test_losses.append(test_loss)
         
         if (epoch + 1) % 10 == 0:
-            print(f"Epoch {epoch + 1}/{epochs} - Train Loss: {train_loss:.4f}, Test Loss: {float(test_loss):.4f}")
+            print(f"Epoch {epoch + 1}/{epochs} - Train Loss: {np.mean(train_loss):.4f}, Test Loss: {float(test_loss):.4f}")
+        
+        if patience is not None:
+            if float(test_loss) < early_stopping['best_loss'] - min_delta:
+                early_stopping.update(best_loss=float(test_loss), epochs_without_improvement=0)
+                best_state = state
+            else:
+                early_stopping['epochs_without_improvement'] += 1
+                if early_stopping['epochs_without_improvement'] >= patience:
+                    print(f"Early stopping at epoch {epoch + 1}: no test loss improvement in {patience} epochs")
+                    early_stopping['stopped'] = True
+                    state = best_state
+                    break
+        
+        if checkpoints is not None and (epoch + 1) % checkpoint_every == 0:
+            checkpoint(epoch + 1)
+    
+    if checkpoints is not None:
+        if len(test_losses) > start_epoch and (early_stopping['stopped'] or len(test_losses) % checkpoint_every):
+            checkpoint(len(test_losses))
+        checkpoints.close()
     
+    history['train_loss'] = [float(np.mean(losses)) for losses in jax.device_get(train_losses)]
+    history['test_loss'] = [float(loss) for loss in jax.device_get(test_losses)]
     return state, history
 
 
@@ -134,8 +266,10 @@ def evaluate_model(state, X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, f
     y_test_jax = jnp.array(y_test, dtype=jnp.float32)
     
                      
-    _, logits = eval_step(state, X_test_jax, y_test_jax)
-    predictions = np.array(logits).flatten()
+    _, outputs = eval_step(state, X_test_jax, y_test_jax)
+    if MODEL_ACTIVATIONS['output'] == 'linear':
+        outputs = jax.nn.sigmoid(outputs)
+    predictions = np.array(outputs).flatten()
     predictions_binary = (predictions > 0.5).astype(int)
     
                      
@@ -150,7 +284,13 @@ def evaluate_model(state, X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, f
     return metrics
 
 
-def save_model(state, version: str, metrics: Dict, output_dir: str = "../../models"):
+def save_model(
+    state,
+    version: str,
+    metrics: Dict,
+    output_dir: str = "../../models",
+    norm_params: Optional[Dict[str, Dict[str, float]]] = None
+):
 \
 \
        
@@ -158,47 +298,64 @@ def save_model(state, version: str, metrics: Dict, output_dir: str = "../../mode
     output_path.mkdir(parents=True, exist_ok=True)
     
                            
-    model_data = {
-        'params': state.params,
+    header = {
         'version': version,
         'metrics': metrics,
-        'trained_at': datetime.now().isoformat()
+        'trained_at': datetime.now().isoformat(),
+        'feature_order': FEATURE_COLUMNS,
+        'norm_params': norm_params,
+        'activations': MODEL_ACTIVATIONS
     }
     
-    model_file = output_path / f"model_{version}.pkl"
-    with open(model_file, 'wb') as f:
-        pickle.dump(model_data, f)
+    model_file = output_path / f"model_{version}{ARTIFACT_SUFFIX}"
+    save_artifact(str(model_file), jax.device_get(state.params), header)
     
     print(f"Model saved to {model_file}")
     return str(model_file)
 
 
-def main():
+def load_features(snapshot_dir: Optional[str] = None, since: Optional[str] = None) -> pd.DataFrame:
+    """
+    Per-user feature frame from a Parquet snapshot, or from the
+    incrementally refreshed feature store when no snapshot is given.
+    """
+    if snapshot_dir:
+        print(f"\n1. Loading snapshot from {snapshot_dir}...")
+        users_df, events_df = load_snapshot(snapshot_dir, start=since)
+        
+        print("\n2. Engineering features...")
+        return extract_user_features(users_df, events_df)
+    
+    print("\n1. Refreshing feature store from database...")
+    store = FeatureStore()
+    store.refresh()
+    users_df = extract_users()
+    
+    print("\n2. Engineering features...")
+    return store.features(users_df)
+
+
+def main(
+    snapshot_dir: Optional[str] = None,
+    since: Optional[str] = None,
+    batch_size: int = 32,
+    data_parallel: bool = False,
+    checkpoint_dir: Optional[str] = None,
+    patience: Optional[int] = None
+):
                                 
     print("=" * 60)
     print("JAX Churn Prediction Model Training")
     print("=" * 60)
     
                                 
-    print("\n1. Extracting data from database...")
-    users_df, events_df = extract_data_from_db()
-    
-                         
-    print("\n2. Engineering features...")
-    features_df = extract_user_features(users_df, events_df)
+    features_df = load_features(snapshot_dir, since)
     
     print(f"Feature distribution:")
     print(features_df['churned'].value_counts())
     
                                  
-    feature_cols = [
-        'days_since_last_active',
-        'total_events',
-        'avg_session_duration',
-        'active_days',
-        'subscription_tier_encoded',
-        'event_type_diversity'
-    ]
+    feature_cols = FEATURE_COLUMNS
     
                         
     features_normalized, norm_params = normalize_features(features_df, feature_cols)
@@ -221,8 +378,11 @@ def main():
         X_train, y_train,
         X_test, y_test,
         epochs=100,
-        batch_size=32,
-        learning_rate=0.001
+        batch_size=batch_size,
+        learning_rate=0.001,
+        data_parallel=data_parallel,
+        checkpoint_dir=checkpoint_dir,
+        patience=patience
     )
     
               
@@ -236,7 +396,7 @@ def main():
                 
     print("\n6. Saving model...")
     version = f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    save_model(state, version, metrics)
+    save_model(state, version, metrics, norm_params=norm_params)
     
     print("\n" + "=" * 60)
     print("Training complete!")
@@ -244,4 +404,21 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the churn prediction model")
+    parser.add_argument('--snapshot', help="Train from a Parquet snapshot directory instead of Postgres")
+    parser.add_argument('--since', help="Only read snapshot events with timestamp >= SINCE")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--data-parallel', action='store_true',
+                        help="Shard each batch across all local devices (batch size must divide evenly)")
+    parser.add_argument('--checkpoint-dir', help="Write periodic checkpoints here and resume from the latest one")
+    parser.add_argument('--patience', type=int, help="Stop after this many epochs without test loss improvement")
+    args = parser.parse_args()
+    
+    main(
+        snapshot_dir=args.snapshot,
+        since=args.since,
+        batch_size=args.batch_size,
+        data_parallel=args.data_parallel,
+        checkpoint_dir=args.checkpoint_dir,
+        patience=args.patience
+    )
@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The components are run from their own directories rather than installed.
+for path in ('backend', 'ml_pipeline', 'lambda_functions/event_processor'):
+    if str(ROOT / path) not in sys.path:
+        sys.path.insert(0, str(ROOT / path))
@@ -0,0 +1,88 @@
+import jax
+import numpy as np
+import pytest
+
+from app.ml.inference import dense_layers, mlp_forward, model_activations
+from deployment.artifact import MAGIC, load_artifact, read_header, save_artifact
+
+
+def make_params(rng, sizes=(4, 8, 3, 1)):
+    return {'params': {
+        f'Dense_{i}': {
+            'kernel': rng.normal(size=(n_in, n_out)).astype(np.float32),
+            'bias': rng.normal(size=n_out).astype(np.float32),
+        }
+        for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:]))
+    }}
+
+
+def reference_forward(params, x, hidden, output):
+    activations = {'relu': lambda v: np.maximum(v, 0), 'tanh': np.tanh}
+    layers = [params['params'][f'Dense_{i}'] for i in range(len(params['params']))]
+    for layer in layers[:-1]:
+        x = activations[hidden](x @ layer['kernel'] + layer['bias'])
+    outputs = (x @ layers[-1]['kernel'] + layers[-1]['bias'])[:, 0]
+    return outputs if output == 'sigmoid' else 1 / (1 + np.exp(-outputs))
+
+
+def test_round_trip(tmp_path):
+    params = make_params(np.random.default_rng(0))
+    path = save_artifact(str(tmp_path / 'model_v1.mdl'), params, {'version': 'v1', 'metrics': {'auc': np.float32(0.5)}})
+
+    loaded, header = load_artifact(path)
+    assert header['version'] == 'v1'
+    assert header['metrics'] == {'auc': 0.5}
+    assert read_header(path) == header
+    for name, layer in params['params'].items():
+        for key, value in layer.items():
+            np.testing.assert_array_equal(loaded['params'][name][key], value)
+            assert loaded['params'][name][key].dtype == value.dtype
+            assert not loaded['params'][name][key].flags.writeable
+
+
+def test_tensors_are_aligned(tmp_path):
+    path = save_artifact(str(tmp_path / 'model.mdl'), make_params(np.random.default_rng(0)), {'version': 'v1'})
+    header = read_header(path)
+    assert all(tensor['offset'] % 64 == 0 for tensor in header['tensors'])
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / 'model.mdl'
+    path.write_bytes(b'\x80\x04' + bytes(len(MAGIC) + 64))
+    with pytest.raises(ValueError, match='bad magic'):
+        load_artifact(str(path))
+
+
+def test_unsupported_dtype(tmp_path):
+    with pytest.raises(ValueError, match='Unsupported dtype'):
+        save_artifact(str(tmp_path / 'model.mdl'), {'w': np.array(['a'])}, {'version': 'v1'})
+
+
+@pytest.mark.parametrize('hidden,output', [('relu', 'linear'), ('tanh', 'linear'), ('relu', 'sigmoid')])
+def test_forward_uses_recorded_activations(tmp_path, hidden, output):
+    rng = np.random.default_rng(1)
+    params = make_params(rng)
+    path = save_artifact(str(tmp_path / 'model.mdl'), params,
+                         {'version': 'v1', 'activations': {'hidden': hidden, 'output': output}})
+    loaded, header = load_artifact(path)
+    x = rng.normal(size=(16, 4)).astype(np.float32)
+
+    probabilities = mlp_forward(jax.device_put(dense_layers(loaded)), x, *model_activations(header))
+    np.testing.assert_allclose(np.asarray(probabilities), reference_forward(params, x, hidden, output),
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_activation_defaults_and_errors():
+    assert model_activations({}) == ('relu', 'linear')
+    with pytest.raises(ValueError, match='hidden activation'):
+        model_activations({'activations': {'hidden': 'swish'}})
+    with pytest.raises(ValueError, match='output activation'):
+        model_activations({'activations': {'output': 'tanh'}})
+
+
+def test_dense_layers_in_numeric_order():
+    params = make_params(np.random.default_rng(0), sizes=tuple(range(2, 15)))
+    layers = dense_layers(params)
+    assert [layer['kernel'].shape[0] for layer in layers] == list(range(2, 14))
+    with pytest.raises(ValueError, match='Unsupported layer'):
+        dense_layers({'params': {'BatchNorm_0': {}}})
@@ -0,0 +1,171 @@
+import json
+from datetime import datetime
+
+import psycopg2
+import pytest
+from pydantic import ValidationError
+
+from app import event_buffer as event_buffer_module
+from app.event_buffer import DEAD_LETTER_FILE, EventBuffer
+from app.schemas import EventCreate
+
+RECEIVED_AT = datetime(2024, 6, 1, 12, 0)
+UNKNOWN_USER = 99
+
+
+class FakeDatabase:
+    """
+    Stands in for ``EventBuffer._write``: refuses COPY data containing a
+    'bad' event and leaves out events for UNKNOWN_USER.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.down = False
+
+    def write(self, data, count):
+        if self.down:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        if '"bad"' in data:
+            raise psycopg2.DataError('invalid input syntax')
+        inserted, left_out = 0, []
+        for line in data.splitlines(keepends=True):
+            received_at, _, batch = line.rstrip('\n').split('\t')
+            events = json.loads(batch)
+            known = [e for e in events if e['user_id'] != UNKNOWN_USER]
+            unknown = [e for e in events if e['user_id'] == UNKNOWN_USER]
+            self.events += known
+            inserted += len(known)
+            if unknown:
+                left_out.append(f"{received_at}\t{len(unknown)}\t{json.dumps(unknown)}\n")
+        return inserted, left_out
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(EventBuffer, '_write', lambda self, data, count: database.write(data, count))
+    monkeypatch.setattr(EventBuffer, '_connection', lambda self: FakeConnection())
+    monkeypatch.setattr(EventBuffer, '_discard_connection', lambda self, broken=True: None)
+    return database
+
+
+def events(*specs):
+    return [EventCreate(user_id=user_id, event_type=event_type) for user_id, event_type in specs]
+
+
+def open_buffer(wal_dir, **kwargs):
+    buffer = EventBuffer(str(wal_dir), **kwargs)
+    buffer._load_wal()
+    return buffer
+
+
+def test_append_requires_start(tmp_path):
+    with pytest.raises(RuntimeError, match='not started'):
+        EventBuffer(str(tmp_path)).append(events((1, 'login')))
+
+
+def test_flush_writes_and_clears_the_wal(tmp_path, database):
+    buffer = open_buffer(tmp_path)
+    buffer.append(events((1, 'login'), (2, 'click')), RECEIVED_AT)
+    buffer.append(events((3, 'login')), RECEIVED_AT)
+
+    assert buffer.flush() == 3
+    assert [e['user_id'] for e in database.events] == [1, 2, 3]
+    assert list(buffer.wal_dir.glob('*.wal')) == []
+    assert buffer.stats()['written'] == 3
+
+
+def test_wal_replay_after_crash(tmp_path, database):
+    crashed = open_buffer(tmp_path)
+    crashed.append(events((1, 'login')), RECEIVED_AT)
+    crashed.append(events((2, 'login'), (3, 'login')), RECEIVED_AT)
+    crashed._segment.write('2024-06-01T12:00:00\t1\t[{"user_id": 4')  # torn by the crash
+    crashed._segment.close()
+    crashed._release_wal_dir()
+
+    replayed = open_buffer(tmp_path)
+    assert replayed.stats()['pending_events'] == 3
+    assert replayed.flush() == 3
+    assert [e['user_id'] for e in database.events] == [1, 2, 3]
+
+
+def test_failed_flush_stays_buffered(tmp_path, database):
+    buffer = open_buffer(tmp_path)
+    buffer.append(events((1, 'login')), RECEIVED_AT)
+
+    database.down = True
+    assert buffer.flush() == 0
+    assert buffer.stats()['pending_events'] == 1
+    assert len(list(buffer.wal_dir.glob('*.wal'))) == 1
+
+    database.down = False
+    assert buffer.flush() == 1
+    assert list(buffer.wal_dir.glob('*.wal')) == []
+
+
+def test_each_buffer_claims_its_own_wal_dir(tmp_path, database):
+    first = open_buffer(tmp_path)
+    second = open_buffer(tmp_path)
+    assert (first.wal_dir.name, second.wal_dir.name) == ('worker-0', 'worker-1')
+
+    second.append(events((1, 'login')), RECEIVED_AT)
+    second._seal_segment()
+    second._release_wal_dir()
+
+    # A buffer starting later takes over segments nobody holds.
+    third = open_buffer(tmp_path)
+    assert third.wal_dir.name == 'worker-1'
+    assert third.flush() == 1
+    assert first.stats()['pending_events'] == 0
+
+
+def test_refused_batches_are_dead_lettered(tmp_path, database):
+    buffer = open_buffer(tmp_path)
+    buffer.append(events((1, 'login')), RECEIVED_AT)
+    buffer.append(events((2, 'login'), (3, 'bad')), RECEIVED_AT)
+    buffer.append(events((4, 'login')), RECEIVED_AT)
+
+    assert buffer.flush() == 2
+    assert [e['user_id'] for e in database.events] == [1, 4]
+    dead_letter = (buffer.wal_dir / DEAD_LETTER_FILE).read_text().splitlines()
+    assert len(dead_letter) == 1 and '"bad"' in dead_letter[0]
+    stats = buffer.stats()
+    assert (stats['dead_lettered'], stats['pending_events'], stats['wal_segments']) == (2, 0, 0)
+
+
+def test_unknown_user_events_are_rejected(tmp_path, database):
+    buffer = open_buffer(tmp_path)
+    buffer.append(events((1, 'login'), (UNKNOWN_USER, 'login'), (UNKNOWN_USER, 'click')), RECEIVED_AT)
+
+    assert buffer.flush() == 1
+    assert buffer.stats()['rejected'] == 2
+    dead_letter = (buffer.wal_dir / DEAD_LETTER_FILE).read_text()
+    received_at, count, batch = dead_letter.rstrip('\n').split('\t')
+    assert (received_at, count) == (RECEIVED_AT.isoformat(), '2')
+    assert [e['event_type'] for e in json.loads(batch)] == ['login', 'click']
+
+
+def test_buffer_full(tmp_path, database):
+    buffer = open_buffer(tmp_path, max_events=2, put_timeout=0.01)
+    buffer.append(events((1, 'login')), RECEIVED_AT)
+    with pytest.raises(event_buffer_module.BufferFull):
+        buffer.append(events((2, 'login'), (3, 'login')), RECEIVED_AT)
+    with pytest.raises(ValueError, match='exceeds the buffer capacity'):
+        buffer.append(events((1, 'a'), (2, 'b'), (3, 'c')), RECEIVED_AT)
+
+
+@pytest.mark.parametrize('fields', [
+    {'user_id': 2**31, 'event_type': 'login'},
+    {'user_id': 1, 'event_type': 'x' * 101},
+    {'user_id': 1, 'event_type': 'log\x00in'},
+    {'user_id': 1, 'event_type': 'login', 'event_data': {'page': ['a\x00']}},
+])
+def test_event_fields_the_database_would_refuse(fields):
+    with pytest.raises(ValidationError):
+        EventCreate(**fields)
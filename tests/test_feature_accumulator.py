@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.feature_engineering import (
+    FeatureAccumulator,
+    aggregate_events,
+    build_feature_frame,
+    encode_categories,
+    extract_user_features,
+    map_user_index,
+    to_epoch_ns,
+)
+
+REFERENCE_TIME = pd.Timestamp('2024-06-01')
+EVENT_TYPES = ['login', 'page_view', 'purchase', 'logout', 'export_data']
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(7)
+    n_users, n_events = 50, 2000
+    users_df = pd.DataFrame({
+        'user_id': np.arange(1, n_users + 1),
+        'created_at': REFERENCE_TIME - pd.to_timedelta(rng.integers(30, 400, n_users), unit='D'),
+        'last_active': pd.NaT,
+        'subscription_tier': rng.choice(['free', 'basic', 'premium', 'enterprise'], n_users),
+        'churned': rng.random(n_users) < 0.3,
+    })
+    durations = rng.uniform(1.0, 60.0, n_events)
+    durations[rng.random(n_events) < 0.1] = np.nan
+    events_df = pd.DataFrame({
+        # A few events for users outside users_df.
+        'user_id': rng.integers(1, n_users + 5, n_events),
+        'event_type': rng.choice(EVENT_TYPES, n_events),
+        'session_duration': durations,
+        'timestamp': REFERENCE_TIME - pd.to_timedelta(rng.integers(0, 90 * 86_400, n_events), unit='s'),
+    })
+    return users_df, events_df
+
+
+def accumulate(users_df, events_df, chunk_size):
+    accumulator = FeatureAccumulator(users_df['user_id'].to_numpy(), compact_every=3)
+    for start in range(0, len(events_df), chunk_size):
+        accumulator.update(events_df.iloc[start:start + chunk_size])
+    return accumulator
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 500, 10_000])
+def test_chunked_matches_batch(frames, chunk_size):
+    users_df, events_df = frames
+    accumulator = accumulate(users_df, events_df, chunk_size)
+
+    pd.testing.assert_frame_equal(
+        build_feature_frame(users_df, accumulator.finalize(), REFERENCE_TIME),
+        extract_user_features(users_df, events_df, REFERENCE_TIME)
+    )
+
+
+def test_finalize_matches_aggregate_events(frames):
+    users_df, events_df = frames
+    user_idx, matched = map_user_index(users_df['user_id'].to_numpy(), events_df['user_id'].to_numpy())
+    codes, _ = encode_categories(events_df['event_type'][matched])
+    expected = aggregate_events(
+        user_idx[matched], len(users_df), codes,
+        events_df['session_duration'].to_numpy()[matched], to_epoch_ns(events_df['timestamp'][matched])
+    )
+
+    agg = accumulate(users_df, events_df, 300).finalize()
+    for name, values in expected.items():
+        np.testing.assert_allclose(agg[name], values, err_msg=name)
+
+
+def test_state_round_trip(frames):
+    users_df, events_df = frames
+    half = len(events_df) // 2
+    accumulator = accumulate(users_df, events_df.iloc[:half], 100)
+
+    restored = FeatureAccumulator.from_state(accumulator.state_dict(), accumulator.event_types, accumulator.n_events)
+    restored.update(events_df.iloc[half:])
+    accumulator.update(events_df.iloc[half:])
+
+    for name, values in accumulator.finalize().items():
+        np.testing.assert_array_equal(restored.finalize()[name], values, err_msg=name)
+    assert restored.n_events == accumulator.n_events
+
+
+def test_add_unknown_users(frames):
+    users_df, events_df = frames
+    accumulator = FeatureAccumulator(np.zeros(0, dtype=np.int64))
+    accumulator.update(events_df, add_unknown_users=True)
+
+    assert accumulator.n_events == len(events_df)
+    assert set(accumulator.user_ids) == set(events_df['user_id'])
+    # Aligning to users_df gives the same features as tracking them upfront.
+    pd.testing.assert_frame_equal(
+        build_feature_frame(users_df, accumulator.finalize(users_df['user_id'].to_numpy()), REFERENCE_TIME),
+        extract_user_features(users_df, events_df, REFERENCE_TIME)
+    )
+
+
+def test_too_many_event_types():
+    accumulator = FeatureAccumulator(np.array([1]))
+    events = pd.DataFrame({
+        'user_id': [1] * 65,
+        'event_type': [f"type_{i}" for i in range(65)],
+        'session_duration': [1.0] * 65,
+        'timestamp': [REFERENCE_TIME] * 65,
+    })
+    with pytest.raises(ValueError):
+        accumulator.update(events)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.feature_engineering import FEATURE_COLUMNS, SUBSCRIPTION_TIERS, extract_user_features
+
+REFERENCE_TIME = pd.Timestamp('2024-06-01')
+
+
+@pytest.fixture
+def users_df():
+    return pd.DataFrame({
+        'user_id': [1, 2, 3, 7],
+        'created_at': pd.to_datetime(['2023-01-01', '2023-02-01', '2023-03-01', '2023-04-01']),
+        'last_active': pd.to_datetime(['2024-05-30 12:00', None, None, '2024-05-01 00:00']),
+        'subscription_tier': ['free', 'premium', 'enterprise', 'unknown'],
+        'churned': [False, True, None, False],
+    })
+
+
+@pytest.fixture
+def events_df():
+    return pd.DataFrame({
+        'user_id': [1, 1, 1, 2, 2, 7, 99],
+        'event_type': ['login', 'login', 'purchase', 'page_view', 'logout', 'login', 'login'],
+        'session_duration': [10.0, 20.0, np.nan, 5.0, 7.0, 1.0, 3.0],
+        'timestamp': pd.to_datetime([
+            '2024-05-01 08:00', '2024-05-01 20:00', '2024-05-03 09:00',
+            '2024-05-10 10:00', '2024-05-20 11:00', '2024-04-30 23:59', '2024-05-05 00:00',
+        ]),
+    })
+
+
+def extract_user_features_reference(users_df, events_df, reference_time):
+    """
+    Straightforward per-user loop the vectorized engine must agree with.
+    """
+    rows = []
+    for user in users_df.itertuples(index=False):
+        events = events_df[events_df['user_id'] == user.user_id]
+        durations = events['session_duration'].dropna()
+        last_seen = user.last_active
+        if pd.isna(last_seen) and len(events):
+            last_seen = events['timestamp'].max()
+        if pd.isna(last_seen):
+            last_seen = user.created_at
+        tier = user.subscription_tier
+        rows.append({
+            'user_id': user.user_id,
+            'days_since_last_active': (reference_time - last_seen) / pd.Timedelta(days=1),
+            'total_events': len(events),
+            'avg_session_duration': durations.mean() if len(durations) else 0.0,
+            'active_days': events['timestamp'].dt.floor('D').nunique(),
+            'subscription_tier_encoded': SUBSCRIPTION_TIERS.index(tier) if tier in SUBSCRIPTION_TIERS else 0,
+            'event_type_diversity': events['event_type'].nunique(),
+            'churned': int(bool(user.churned)) if not pd.isna(user.churned) else 0,
+        })
+    return pd.DataFrame(rows)
+
+
+def test_matches_reference(users_df, events_df):
+    features = extract_user_features(users_df, events_df, REFERENCE_TIME)
+    expected = extract_user_features_reference(users_df, events_df, REFERENCE_TIME)
+
+    assert list(features.columns) == ['user_id'] + FEATURE_COLUMNS + ['churned']
+    pd.testing.assert_frame_equal(features, expected, check_dtype=False)
+
+
+def test_known_values(users_df, events_df):
+    features = extract_user_features(users_df, events_df, REFERENCE_TIME).set_index('user_id')
+
+    assert features.loc[1, 'total_events'] == 3
+    assert features.loc[1, 'avg_session_duration'] == pytest.approx(15.0)
+    assert features.loc[1, 'active_days'] == 2
+    assert features.loc[1, 'event_type_diversity'] == 2
+    assert features.loc[1, 'days_since_last_active'] == pytest.approx(1.5)
+    # No last_active: falls back to the latest event, then to created_at.
+    assert features.loc[2, 'days_since_last_active'] == pytest.approx(11 + 13 / 24)
+    assert features.loc[3, 'total_events'] == 0
+    assert features.loc[3, 'days_since_last_active'] == pytest.approx((REFERENCE_TIME - pd.Timestamp('2023-03-01')).days)
+    assert features.loc[7, 'subscription_tier_encoded'] == 0
+
+
+def test_categorical_columns_match_object_columns(users_df, events_df):
+    categorical = events_df.astype({'event_type': 'category'})
+    users = users_df.astype({'subscription_tier': pd.CategoricalDtype(SUBSCRIPTION_TIERS + ['unknown'])})
+
+    pd.testing.assert_frame_equal(
+        extract_user_features(users, categorical, REFERENCE_TIME),
+        extract_user_features(users_df, events_df, REFERENCE_TIME)
+    )
+
+
+def test_sparse_user_ids(users_df, events_df):
+    # Ids far apart take the sorted lookup instead of the dense table.
+    users_df = users_df.assign(user_id=users_df['user_id'] * 1_000_000)
+    events_df = events_df.assign(user_id=events_df['user_id'] * 1_000_000)
+
+    pd.testing.assert_frame_equal(
+        extract_user_features(users_df, events_df, REFERENCE_TIME),
+        extract_user_features_reference(users_df, events_df, REFERENCE_TIME),
+        check_dtype=False
+    )
+
+
+def test_no_events(users_df, events_df):
+    features = extract_user_features(users_df, events_df.iloc[:0], REFERENCE_TIME)
+
+    assert (features['total_events'] == 0).all()
+    assert (features['avg_session_duration'] == 0.0).all()
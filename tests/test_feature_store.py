@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from data.feature_engineering import FeatureAccumulator
+from data.feature_store import FeatureStore, _open_ranges
+
+REFERENCE_TIME = pd.Timestamp('2024-06-01')
+
+
+def make_events(user_ids, days_ago):
+    return pd.DataFrame({
+        'user_id': user_ids,
+        'event_type': ['login'] * len(user_ids),
+        'session_duration': [10.0] * len(user_ids),
+        'timestamp': [REFERENCE_TIME - pd.Timedelta(days=d) for d in days_ago],
+    })
+
+
+def test_open_ranges_cuts_found_ids():
+    pending = [[10, 20, 500]]
+    assert _open_ranges(pending, np.array([10, 15, 16, 20]), xmin=400) == [[11, 14, 500], [17, 19, 500]]
+
+
+def test_open_ranges_closes_finished_transactions():
+    pending = [[10, 20, 500], [30, 30, 600]]
+    assert _open_ranges(pending, np.zeros(0, dtype=np.int64), xmin=550) == [[30, 30, 600]]
+    assert _open_ranges(pending, np.array([30]), xmin=100) == [[10, 20, 500]]
+
+
+def test_save_and_reload(tmp_path):
+    accumulator = FeatureAccumulator(np.zeros(0, dtype=np.int64))
+    accumulator.update(make_events([1, 1, 2], [1, 3, 5]), add_unknown_users=True)
+
+    store = FeatureStore(str(tmp_path))
+    store.save(accumulator, 42, REFERENCE_TIME.isoformat(), [[5, 6, 900]])
+    first_snapshot = store.meta['snapshot']
+
+    reloaded = FeatureStore(str(tmp_path))
+    assert reloaded.watermark_event_id == 42
+    assert reloaded.meta['pending_event_ranges'] == [[5, 6, 900]]
+    for name, values in accumulator.finalize().items():
+        np.testing.assert_array_equal(reloaded.load_accumulator().finalize()[name], values, err_msg=name)
+
+    # A new snapshot replaces the old one.
+    accumulator.update(make_events([3], [0]), add_unknown_users=True)
+    reloaded.save(accumulator, 43, REFERENCE_TIME.isoformat())
+    assert not (tmp_path / first_snapshot).exists()
+    assert FeatureStore(str(tmp_path)).meta['n_users'] == 3
+
+
+def test_features_for_users_without_events(tmp_path):
+    accumulator = FeatureAccumulator(np.zeros(0, dtype=np.int64))
+    accumulator.update(make_events([1, 1], [1, 2]), add_unknown_users=True)
+    store = FeatureStore(str(tmp_path))
+    store.save(accumulator, 2, None)
+
+    users_df = pd.DataFrame({
+        'user_id': [1, 2],
+        'created_at': [REFERENCE_TIME - pd.Timedelta(days=100)] * 2,
+        'last_active': [pd.NaT, pd.NaT],
+        'subscription_tier': ['free', 'basic'],
+        'churned': [False, False],
+    })
+    features = store.features(users_df, REFERENCE_TIME).set_index('user_id')
+    assert features.loc[1, 'total_events'] == 2
+    assert features.loc[1, 'days_since_last_active'] == 1.0
+    assert features.loc[2, 'total_events'] == 0
+    assert features.loc[2, 'days_since_last_active'] == 100.0
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from app.ml.features import FEATURE_COLUMNS
+from app.ml.inference import MLEngine
+from deployment.artifact import save_artifact
+
+
+def make_artifact(path, norm_params=None, feature_order=FEATURE_COLUMNS):
+    rng = np.random.default_rng(0)
+    n_features = len(FEATURE_COLUMNS)
+    params = {'params': {
+        'Dense_0': {'kernel': rng.normal(size=(n_features, 8)).astype(np.float32),
+                    'bias': rng.normal(size=8).astype(np.float32)},
+        'Dense_1': {'kernel': rng.normal(size=(8, 1)).astype(np.float32),
+                    'bias': rng.normal(size=1).astype(np.float32)},
+    }}
+    header = {'version': 'v1', 'feature_order': feature_order, 'norm_params': norm_params,
+              'activations': {'hidden': 'relu', 'output': 'linear'}}
+    return save_artifact(str(path), params, header), params['params']
+
+
+def reference_proba(layers, x):
+    hidden = np.maximum(x @ layers['Dense_0']['kernel'] + layers['Dense_0']['bias'], 0)
+    logits = (hidden @ layers['Dense_1']['kernel'] + layers['Dense_1']['bias'])[:, 0]
+    return 1 / (1 + np.exp(-logits))
+
+
+def test_predict_proba_normalizes_features(tmp_path):
+    rng = np.random.default_rng(1)
+    mean = rng.normal(size=len(FEATURE_COLUMNS)) * 10
+    std = rng.uniform(0.5, 5.0, size=len(FEATURE_COLUMNS))
+    std[0] = 0.0  # a constant training column is left unscaled
+    norm_params = {col: {'mean': float(m), 'std': float(s)} for col, m, s in zip(FEATURE_COLUMNS, mean, std)}
+    path, layers = make_artifact(tmp_path / 'model_v1.mdl', norm_params)
+
+    engine = MLEngine(path)
+    x = (rng.normal(size=(50, len(FEATURE_COLUMNS))) * 10).astype(np.float32)
+
+    expected = reference_proba(layers, ((x - mean) / np.where(std > 0, std, 1.0)).astype(np.float32))
+    np.testing.assert_allclose(engine.predict_proba(x), expected, rtol=1e-4, atol=1e-6)
+    assert engine.predict(x[3]) == pytest.approx(expected[3], rel=1e-4)
+
+
+def test_without_norm_params_uses_raw_features(tmp_path):
+    path, layers = make_artifact(tmp_path / 'model_v1.mdl')
+    engine = MLEngine(path)
+    x = np.random.default_rng(2).normal(size=(6, len(FEATURE_COLUMNS))).astype(np.float32)
+    np.testing.assert_allclose(engine.predict_proba(x), reference_proba(layers, x), rtol=1e-4, atol=1e-6)
+
+
+def test_rejects_other_feature_order(tmp_path):
+    path, _ = make_artifact(tmp_path / 'model_v1.mdl', feature_order=FEATURE_COLUMNS[::-1])
+    with pytest.raises(ValueError, match='expects features'):
+        MLEngine(path)
+
+
+def test_padded_buckets_match_unpadded(tmp_path):
+    path, layers = make_artifact(tmp_path / 'model_v1.mdl')
+    engine = MLEngine(path, buckets=[1, 8, 32])
+    assert set(engine.compile()) == {1, 8, 32}
+    assert [engine.bucket_size(n) for n in (1, 2, 8, 9, 32, 100)] == [1, 8, 8, 32, 32, 32]
+
+    x = np.random.default_rng(3).normal(size=(75, len(FEATURE_COLUMNS))).astype(np.float32)
+    for n in (1, 5, 32, 75):
+        np.testing.assert_allclose(engine.predict_proba(x[:n]), reference_proba(layers, x[:n]), rtol=1e-4, atol=1e-6)
@@ -0,0 +1,144 @@
+import base64
+import json
+
+import psycopg2
+import pytest
+
+import handler
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql)
+        if 'FROM users' in sql:
+            self._rows = [(user_id,) for user_id in params[0] if user_id in self.conn.known_users]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self, known_users):
+        self.known_users = set(known_users)
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conn = FakeConnection(known_users={1, 2, 3})
+    written = []
+
+    def write_events(_, events, received_at):
+        if any(e['event_type'] == 'bad' for e in events):
+            raise psycopg2.DataError('value too long for type character varying(100)')
+        written.extend(events)
+        return list(range(len(written) - len(events) + 1, len(written) + 1))
+
+    monkeypatch.setattr(handler, 'get_connection', lambda: conn)
+    monkeypatch.setattr(handler, 'write_events', write_events)
+    monkeypatch.setattr(handler, 'dead_letter', lambda rejected: None)
+    conn.written = written
+    return conn
+
+
+def sqs_record(message_id, body):
+    return {'messageId': message_id, 'body': json.dumps(body)}
+
+
+def test_extract_events_rejects_malformed_records():
+    kinesis = {'kinesis': {'sequenceNumber': 'k1',
+                           'data': base64.b64encode(json.dumps({'user_id': 1, 'event_type': 'login'}).encode()).decode()}}
+    event = {'Records': [
+        sqs_record('m1', [{'user_id': 1, 'event_type': 'login'}, {'user_id': '2', 'event_type': 'click'}]),
+        sqs_record('m2', {'user_id': 1}),
+        sqs_record('m3', {'user_id': 'abc', 'event_type': 'login'}),
+        sqs_record('m4', {'user_id': 1, 'event_type': 'login', 'timestamp': 'yesterday'}),
+        {'messageId': 'm5', 'body': '{not json'},
+        kinesis,
+    ]}
+
+    records, rejected, is_batch = handler.extract_events(event)
+
+    assert is_batch
+    assert [item_id for item_id, _ in records] == ['m1', 'k1']
+    assert len(records[0][1]) == 2
+    assert [item_id for item_id, _, _ in rejected] == ['m2', 'm3', 'm4', 'm5']
+    assert all(reason.startswith('malformed') for _, reason, _ in rejected)
+
+
+def test_extract_events_outside_a_batch():
+    records, rejected, is_batch = handler.extract_events(json.dumps([
+        {'user_id': 1, 'event_type': 'login'}, {'event_type': 'login'}
+    ]))
+    assert not is_batch
+    assert records == [(None, [{'user_id': 1, 'event_type': 'login'}])]
+    assert len(rejected) == 1
+
+
+def test_records_are_rejected_whole(conn):
+    records = [
+        ('m1', [{'user_id': 1, 'event_type': 'login'}]),
+        ('m2', [{'user_id': 2, 'event_type': 'login'}, {'user_id': 99, 'event_type': 'login'}]),
+        ('m3', [{'user_id': 3, 'event_type': 'click'}, {'user_id': 3, 'event_type': 'bad'}]),
+        ('m4', [{'user_id': 2, 'event_type': 'click'}]),
+    ]
+
+    event_ids, rejected = handler.process_events(records)
+
+    assert [e['user_id'] for e in conn.written] == [1, 2]
+    assert len(event_ids) == 2
+    assert {item_id: reason.split(':')[0] for item_id, reason, _ in rejected} == {
+        'm2': 'unknown users [99]', 'm3': 'refused by database'
+    }
+    assert conn.statements.count('ROLLBACK TO SAVEPOINT record') == 1
+    assert conn.commits == 1
+
+
+def test_batch_response_retries_only_transient_failures(conn):
+    event = {'Records': [
+        sqs_record('m1', {'user_id': 1, 'event_type': 'login'}),
+        sqs_record('m2', {'user_id': 99, 'event_type': 'login'}),
+        sqs_record('m3', {'event_type': 'login'}),
+    ]}
+
+    response = handler.lambda_handler(event, None)
+    assert response['batchItemFailures'] == []
+    assert json.loads(response['body'])['rejected'] == 2
+
+
+def test_database_outage_returns_records_for_retry(conn, monkeypatch):
+    def unavailable(records):
+        raise psycopg2.OperationalError('could not connect to server')
+
+    monkeypatch.setattr(handler, 'process_events', unavailable)
+    event = {'Records': [
+        sqs_record('m1', {'user_id': 1, 'event_type': 'login'}),
+        sqs_record('m2', {'event_type': 'login'}),
+        sqs_record('m3', {'user_id': 2, 'event_type': 'login'}),
+    ]}
+
+    response = handler.lambda_handler(event, None)
+    assert response['batchItemFailures'] == [{'itemIdentifier': 'm1'}, {'itemIdentifier': 'm3'}]
+
+    assert handler.lambda_handler({'user_id': 1, 'event_type': 'login'}, None)['statusCode'] == 500
@@ -0,0 +1,92 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.ml import cache as cache_module
+from app.ml.cache import PredictionCache
+from app.routers import predictions
+
+RESPONSE = {'churn_probability': 0.25}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    return now
+
+
+def test_key_changes_with_model_version_and_watermark(monkeypatch):
+    store = SimpleNamespace(watermark='10')
+    monkeypatch.setattr(predictions, 'get_feature_store', lambda: store)
+    user = SimpleNamespace(user_id=7, last_active=datetime(2024, 5, 1, 12, 0))
+    cache = PredictionCache()
+
+    cache.set(predictions._cache_key(user, 'v1'), RESPONSE)
+    assert cache.get(predictions._cache_key(user, 'v1')) == RESPONSE
+    assert cache.get(predictions._cache_key(user, 'v2')) is None
+
+    user.last_active = datetime(2024, 5, 2, 8, 30)
+    assert cache.get(predictions._cache_key(user, 'v1')) is None
+    cache.set(predictions._cache_key(user, 'v1'), RESPONSE)
+
+    store.watermark = '11'
+    assert cache.get(predictions._cache_key(user, 'v1')) is None
+
+    user.last_active = None
+    assert predictions._cache_key(user, 'v1') == (7, 'v1', '@11')
+
+
+def test_invalidate_user_and_clear():
+    cache = PredictionCache()
+    for key in [(1, 'v1', 'a'), (1, 'v2', 'a'), (2, 'v1', 'a')]:
+        cache.set(key, RESPONSE)
+
+    cache.invalidate_user(1)
+    assert cache.get((1, 'v1', 'a')) is None
+    assert cache.get((1, 'v2', 'a')) is None
+    assert cache.get((2, 'v1', 'a')) == RESPONSE
+
+    cache.clear()
+    assert cache.get((2, 'v1', 'a')) is None
+    assert cache.stats()['invalidations'] == 2
+
+
+def test_entries_expire(clock):
+    cache = PredictionCache(ttl_seconds=60)
+    cache.set((1, 'v1', 'a'), RESPONSE)
+    clock[0] += 59
+    assert cache.get((1, 'v1', 'a')) == RESPONSE
+    clock[0] += 2
+    assert cache.get((1, 'v1', 'a')) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.set((1, 'v1', 'a'), RESPONSE)
+    cache.set((2, 'v1', 'a'), RESPONSE)
+    cache.get((1, 'v1', 'a'))
+    cache.set((3, 'v1', 'a'), RESPONSE)
+
+    assert cache.get((2, 'v1', 'a')) is None
+    assert cache.get((1, 'v1', 'a')) == RESPONSE
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 2, 1)
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+
+def test_sqlite_shares_entries_between_workers(tmp_path, clock):
+    path = str(tmp_path / 'cache' / 'predictions.sqlite')
+    first, second = PredictionCache(sqlite_path=path, ttl_seconds=60), PredictionCache(sqlite_path=path)
+
+    first.set((1, 'v1', 'a'), RESPONSE)
+    first.set((2, 'v1', 'a'), RESPONSE)
+    assert second.get((1, 'v1', 'a')) == RESPONSE
+
+    first.invalidate_user(2)
+    assert second.get((2, 'v1', 'a')) is None
+
+    clock[0] += 61
+    assert PredictionCache(sqlite_path=path).get((1, 'v1', 'a')) is None